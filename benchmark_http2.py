@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Benchmark comparing the requests (HTTP/1.1) and http2 (httpx) fetch backends
+against local servers, so results do not depend on network conditions.
+
+Two servers serve the same synthetic directory pages: a threaded HTTP/1.1
+server and a cleartext HTTP/2 (h2c) server built on the h2 library. Both
+compress responses with the best coding the client advertises and count the
+bytes that cross the socket in each direction.
+
+Requires: pip3 install 'httpx[http2]' brotli zstandard
+"""
+
+import argparse
+import asyncio
+import gzip
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import brotli
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    print("Error: h2 and brotli are required for this benchmark.")
+    print("Please run: pip3 install 'httpx[http2]' brotli zstandard")
+    exit(1)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from es import Http2Session, REQUEST_HEADERS, make_session, supported_encodings
+
+def build_pages(count, rows):
+    """Generate directory-style pages similar to the ones the scraper targets"""
+    pages = {}
+    for page in range(count):
+        body = [f"<html><head><title>Member directory page {page}</title></head><body><table>"]
+        for row in range(rows):
+            body.append(
+                f'<tr class="member"><td class="name">Member {page}-{row}</td>'
+                f'<td class="phone">+1 555 {page:03d} {row:04d}</td>'
+                f'<td class="email"><a href="mailto:member{page}.{row}@example.com">member{page}.{row}@example.com</a></td>'
+                f'<td class="site"><a href="/member/{page}/{row}">Profile</a></td></tr>'
+            )
+        body.append("</table></body></html>")
+        pages[f"/page/{page}"] = "\n".join(body).encode('utf-8')
+    return pages
+
+ENCODERS = {
+    'gzip': lambda data: gzip.compress(data, compresslevel=6),
+    'deflate': lambda data: zlib.compress(data, 6),
+    'br': lambda data: brotli.compress(data, quality=5),
+}
+if zstandard is not None:
+    ENCODERS['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+
+class PageStore:
+    """Pages pre-encoded in every supported coding, plus wire statistics"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self._encoded = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.connections = 0
+
+    def count(self, bytes_in=0, bytes_out=0, connections=0):
+        with self._lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.connections += connections
+
+    def render(self, path, accept_encoding):
+        """Return (status, body, content coding) for a request"""
+        page = self.pages.get(path)
+        if page is None:
+            return 404, b"", None
+
+        offered = [token.split(';')[0].strip() for token in accept_encoding.split(',')]
+        for coding in offered:
+            if coding in ENCODERS:
+                key = (path, coding)
+                if key not in self._encoded:
+                    self._encoded[key] = ENCODERS[coding](page)
+                return 200, self._encoded[key], coding
+        return 200, page, None
+
+class CountingWriter:
+    """Wraps a handler's wfile to count response bytes"""
+
+    def __init__(self, raw, store):
+        self.raw = raw
+        self.store = store
+
+    def write(self, data):
+        self.store.count(bytes_out=len(data))
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+class Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store = None
+
+    def setup(self):
+        super().setup()
+        self.store.count(connections=1)
+        self.wfile = CountingWriter(self.wfile, self.store)
+
+    def do_GET(self):
+        # Request line and headers, approximated from what was parsed
+        self.store.count(bytes_in=len(self.requestline) + 2 + len(str(self.headers)))
+        status, body, coding = self.store.render(self.path, self.headers.get('Accept-Encoding', ''))
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if coding:
+            self.send_header('Content-Encoding', coding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class H2ServerProtocol(asyncio.Protocol):
+    """Minimal h2c server: answers GETs from the page store with flow control"""
+
+    def __init__(self, store):
+        self.store = store
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+        )
+        self.transport = None
+        self.pending = {}  # stream id -> body bytes not yet sent
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.store.count(connections=1)
+        self.conn.initiate_connection()
+        self._flush()
+
+    def data_received(self, data):
+        self.store.count(bytes_in=len(data))
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            self._flush()
+            self.transport.close()
+            return
+
+        for event in events:
+            if isinstance(event, h2.events.RequestReceived):
+                self._respond(event.stream_id, dict(event.headers))
+            elif isinstance(event, h2.events.WindowUpdated):
+                self._send_pending()
+            elif isinstance(event, h2.events.StreamReset):
+                self.pending.pop(event.stream_id, None)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self._flush()
+
+    def _respond(self, stream_id, headers):
+        status, body, coding = self.store.render(headers.get(':path'), headers.get('accept-encoding', ''))
+        response_headers = [
+            (':status', str(status)),
+            ('content-type', 'text/html; charset=utf-8'),
+            ('content-length', str(len(body))),
+        ]
+        if coding:
+            response_headers.append(('content-encoding', coding))
+        self.conn.send_headers(stream_id, response_headers)
+        self.pending[stream_id] = body
+        self._send_pending()
+
+    def _send_pending(self):
+        for stream_id in list(self.pending):
+            body = self.pending[stream_id]
+            while body:
+                window = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+                if window <= 0:
+                    break
+                self.conn.send_data(stream_id, body[:window])
+                body = body[window:]
+            if body:
+                self.pending[stream_id] = body
+            else:
+                self.conn.end_stream(stream_id)
+                del self.pending[stream_id]
+
+    def _flush(self):
+        data = self.conn.data_to_send()
+        if data:
+            self.store.count(bytes_out=len(data))
+            self.transport.write(data)
+
+def start_http1_server(store):
+    handler = type('Handler', (Http1Handler,), {'store': store})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+def start_h2_server(store):
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(loop.create_server(lambda: H2ServerProtocol(store), '127.0.0.1', 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1]
+
+def run_case(session, base_url, paths, concurrency):
+    """Fetch every path through the session and return (seconds, pages fetched)"""
+    def fetch_one(path):
+        response = session.get(base_url + path, timeout=(10, 30))
+        with response:
+            return response.status_code == 200 and len(response.text) > 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        ok = sum(executor.map(fetch_one, paths))
+    return time.perf_counter() - start, ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTTP/1.1 and HTTP/2 fetch backends on local servers")
+    parser.add_argument("--pages", type=int, default=200, help="Pages per run (default: 200)")
+    parser.add_argument("--rows", type=int, default=300, help="Directory rows per page (default: 300)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests (default: 8)")
+    args = parser.parse_args()
+
+    print("🚀 Fetch Backend Benchmark (local servers)\n")
+    store = PageStore(build_pages(args.pages, args.rows))
+    paths = list(store.pages)
+    raw_size = sum(len(page) for page in store.pages.values()) / len(paths)
+    print(f"   {len(paths)} pages, {raw_size / 1024:.1f} KiB uncompressed each, concurrency {args.concurrency}")
+
+    http1_url = f"http://127.0.0.1:{start_http1_server(store)}"
+    h2_url = f"http://127.0.0.1:{start_h2_server(store)}"
+
+    cases = []
+    for best in (False, True):
+        for backend, protocol, base_url in (('requests', 'HTTP/1.1', http1_url), ('http2', 'HTTP/2', h2_url)):
+            # Each backend only advertises the codings it can decode
+            accept_encoding = supported_encodings(backend) if best else 'gzip, deflate'
+            if not best or accept_encoding != 'gzip, deflate':
+                cases.append((backend, protocol, base_url, accept_encoding))
+
+    print(f"\n{'backend':<9} {'protocol':<9} {'Accept-Encoding':<28} {'pages/s':>8} {'KiB out/page':>13} {'B in/page':>10} {'conns':>6}")
+    for backend, protocol, base_url, accept_encoding in cases:
+        if backend == 'http2':
+            # Plain http:// needs prior knowledge to speak HTTP/2
+            session = Http2Session(prior_knowledge=True)
+            session.headers.update(REQUEST_HEADERS)
+        else:
+            session = make_session(backend)
+        session.headers['Accept-Encoding'] = accept_encoding
+
+        with session:
+            run_case(session, base_url, paths[:args.concurrency], args.concurrency)  # warm up connections
+            store.reset()
+            elapsed, ok = run_case(session, base_url, paths, args.concurrency)
+
+        print(f"{backend:<9} {protocol:<9} {accept_encoding:<28} {ok / elapsed:>8.1f} "
+              f"{store.bytes_out / ok / 1024:>13.2f} {store.bytes_in / ok:>10.0f} {store.connections:>6}")
+
+    print("\n💡 conns counts connections opened after warm-up; HTTP/2 reuses one per host.")
+    print("   pages/s also reflects the two local server implementations, so compare bytes first.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Adversarial benchmark for the email matcher.
+
+Times the old EMAIL_PATTERNS['basic'] regex against es.find_emails on inputs
+built to trigger backtracking: long dotted runs (minified JS), '@'-heavy
+text, base64 blobs and huge domains. Each input is run at growing sizes.
+A linear matcher's time grows by about 4x per step, while a quadratic one
+grows by about 16x.
+"""
+
+import argparse
+import base64
+import random
+import re
+import time
+
+from config import EMAIL_PATTERNS
+from es import ScanBudget, find_emails
+
+LEGACY_PATTERN = re.compile(EMAIL_PATTERNS['basic'])
+
+ADVERSARIAL_INPUTS = {
+    'dotted run': lambda n: 'a.' * (n // 2),
+    'dotted run + @': lambda n: 'a.' * (n // 2) + '@',
+    'dotted local@dotted': lambda n: 'a.' * (n // 4) + '@' + 'b.' * (n // 4),
+    'many @': lambda n: 'a@' * (n // 2),
+    'dot-@ mix': lambda n: 'a.b@' * (n // 4),
+    'domain without tld': lambda n: 'x@' + 'a-' * (n // 2),
+    'base64 blob': lambda n: base64.b64encode(random.Random(n).randbytes(n * 3 // 4)).decode().replace('/', '@'),
+    'minified js': lambda n: ('var a=b.c.d.e.f;x.y@z.w1.q2;' * (n // 29 + 1))[:n],
+    'directory page': lambda n: (' Contact jane.doe@example.com or sales@example.org. ' * (n // 52 + 1))[:n],
+}
+
+def time_call(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the email matcher on adversarial inputs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4000, 16000, 64000, 256000],
+                        help="Input sizes in characters (default: 4000 16000 64000 256000)")
+    parser.add_argument("--legacy-limit", type=float, default=2.0,
+                        help="Stop timing the legacy regex on an input once a run exceeds this many seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    print("🚀 Email Matcher Adversarial Benchmark\n")
+    header = f"{'input':<22} {'chars':>8} {'legacy regex':>14} {'find_emails':>13} {'speedup':>9}"
+    print(header)
+    print("-" * len(header))
+
+    worst_growth = 0.0
+    for name, build in ADVERSARIAL_INPUTS.items():
+        legacy_skipped = False
+        previous = None
+        for size in args.sizes:
+            text = build(size)
+
+            new_time = time_call(find_emails, text, args.repeat)
+            # Sub-0.1 ms timings are mostly noise
+            if previous is not None and previous >= 0.0001:
+                worst_growth = max(worst_growth, (new_time / previous) / (size / previous_size))
+            previous, previous_size = new_time, size
+
+            if legacy_skipped:
+                legacy = "skipped"
+                speedup = ""
+            else:
+                legacy_time = time_call(LEGACY_PATTERN.findall, text, 1)
+                legacy_skipped = legacy_time > args.legacy_limit
+                legacy = f"{legacy_time * 1000:.2f} ms"
+                speedup = f"{legacy_time / new_time:.1f}x" if new_time > 0 else ""
+
+                # Both matchers must agree on well-formed input
+                if name == 'directory page':
+                    assert set(LEGACY_PATTERN.findall(text)) == set(find_emails(text))
+
+            print(f"{name:<22} {len(text):>8} {legacy:>14} {new_time * 1000:>10.2f} ms {speedup:>9}")
+
+    print(f"\n📈 Worst find_emails growth relative to input growth: {worst_growth:.2f}x (1.0 = linear)")
+
+    # Time budget: a page far larger than any real one is cut off promptly
+    text = ADVERSARIAL_INPUTS['dot-@ mix'](20_000_000)
+    budget = ScanBudget(0.05)
+    start = time.perf_counter()
+    find_emails(text, budget)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️  {len(text) // 1_000_000}M-char page with a 50 ms budget: stopped after {elapsed * 1000:.1f} ms "
+          f"(exhausted: {budget.exhausted})")
+
+if __name__ == "__main__":
+    main()
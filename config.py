@@ -11,14 +11,30 @@ SCRAPING_CONFIG = {
     'max_retries': 3,              # Maximum retry attempts for failed requests
     'follow_redirects': True,      # Whether to follow HTTP redirects
     'verify_ssl': True,            # Whether to verify SSL certificates
+    'backend': 'requests',         # Fetch backend: 'requests' (HTTP/1.1) or 'http2' (httpx)
+}
+
+# Per-host latency tracking, adaptive timeouts and circuit breaking
+HOST_HEALTH_CONFIG = {
+    'max_timeout': 30,             # Read timeout cap and default before a host has history (seconds)
+    'min_timeout': 5,              # Never set a learned read timeout below this (seconds)
+    'connect_timeout': 10,         # Connect timeout (seconds)
+    'timeout_percentile': 0.95,    # Latency percentile the learned timeout is based on
+    'timeout_multiplier': 3.0,     # Learned timeout = percentile latency x multiplier
+    'min_samples': 5,              # Responses needed before timeouts adapt
+    'window': 50,                  # Recent responses kept per host
+    'failure_threshold': 3,        # Consecutive failures before a host's circuit opens
+    'cooldown': 60,                # Seconds an open circuit blocks requests to the host
+    'hedge_percentile': 0.9,       # With --hedge, send a backup request after this percentile latency
+    'hedge_workers': 4,            # Threads used for hedged requests; no hedging while all are busy
 }
 
 # HTTP Headers Configuration
 HTTP_HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (compatible; MailScraper/1.0; +https://github.com/your-repo)',
+    'User-Agent': 'Mozilla/5.0 (compatible; MailScraper/1.0)',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
     'Accept-Language': 'en-US,en;q=0.5',
-    'Accept-Encoding': 'gzip, deflate',
+    'Accept-Encoding': 'gzip, deflate',  # Replaced per backend with every coding it can decode (see es.supported_encodings)
     'Connection': 'keep-alive',
     'Upgrade-Insecure-Requests': '1',
 }
@@ -30,11 +46,22 @@ EMAIL_EXTRACTION_CONFIG = {
     'extract_from_data_attrs': True,  # Extract emails from data attributes
     'extract_from_meta': True,     # Extract emails from meta tags
     'case_sensitive': False,       # Whether email matching is case sensitive
-    'validate_emails': True,       # Whether to validate email format
+    'validate_emails': True,       # Reject malformed addresses, unknown TLDs and asset names
+    'scan_budget_seconds': 0.5,    # Max time spent scanning one page's text for emails (0 = unlimited)
+    'check_tld': True,             # Require a known top-level domain (see tlds.py)
+    'filter_assets': True,         # Drop asset-like false positives such as logo@2x.png
+    'asset_extensions': [          # File extensions that are never email domains
+        # map, mov and zip are real TLDs, so they are deliberately not listed here
+        'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp', 'avif', 'ico', 'bmp', 'tif', 'tiff',
+        'css', 'js', 'mjs', 'json', 'xml', 'woff', 'woff2', 'ttf', 'otf', 'eot',
+        'mp3', 'mp4', 'webm', 'avi', 'pdf', 'gz', 'php', 'html', 'htm',
+    ],
 }
 
 # Regex Patterns (pre-compiled for efficiency)
 EMAIL_PATTERNS = {
+    # Reference only: es.find_emails implements this match in linear time, since the
+    # regex backtracks quadratically on long dotted runs (see benchmark_matcher.py)
     'basic': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',
     'mailto': r'mailto:([^?&\s]+)',
     'data_email': r'data-email=["\']([^"\']+)["\']',
@@ -48,6 +75,9 @@ LOGGING_CONFIG = {
     'file': 'scraper.log',
     'max_file_size': 10 * 1024 * 1024,  # 10MB
     'backup_count': 5,
+    'json': False,                 # Write JSON lines instead of the plain format
+    'rate_limit_per_url': 20,      # Max info/debug records per URL per interval
+    'rate_limit_interval': 60,     # Rate limit window in seconds
 }
 
 # Rate Limiting Configuration
@@ -86,6 +116,21 @@ PERFORMANCE_CONFIG = {
     'enable_compression': True,    # Enable gzip compression for requests
 }
 
+# Page archive configuration (--archive / --replay)
+ARCHIVE_CONFIG = {
+    'max_file_size': 1024 * 1024 * 1024,  # Start a new .warc.gz file after this many bytes
+    'compress_level': 6,           # gzip level for archive records
+    'min_replay_split': 256 * 1024,  # Smallest byte range of a file handed to one --replay worker
+}
+
+# Profiling Configuration (used by --profile)
+PROFILING_CONFIG = {
+    'output_dir': 'profile',       # Where scraper.pstats, scraper.collapsed and allocations.txt go
+    'sample_interval': 0.005,      # Seconds between stack samples for the collapsed-stack file
+    'top_allocators': 25,          # Number of allocation sites listed in allocations.txt
+    'traceback_frames': 10,        # Frames kept per allocation by tracemalloc
+}
+
 # Debug Configuration
 DEBUG_CONFIG = {
     'verbose_logging': False,      # Enable verbose logging
@@ -1,4 +1,6 @@
 import requests
+import urllib3
+import idna
 try:
     from bs4 import BeautifulSoup
 except ImportError:
@@ -35,9 +37,65 @@ except ImportError:
             print(f"{self.desc} - Completed!")
     
     tqdm = SimpleProgressBar
+import importlib.util
 import logging
-from collections import deque
+import logging.handlers
+import json
+import gzip
+import io
+import multiprocessing
+import queue
+import uuid
+import codecs
+import copy
+import os
+import sys
+import cProfile
+import threading
+import tracemalloc
+import zlib
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+from html.parser import HTMLParser
+from functools import lru_cache
 from urllib.robotparser import RobotFileParser
+from config import (ARCHIVE_CONFIG, EMAIL_EXTRACTION_CONFIG, HOST_HEALTH_CONFIG, HTTP_HEADERS, LOGGING_CONFIG,
+                    PROFILING_CONFIG, SCRAPING_CONFIG)
+from tlds import TLDS
+try:
+    import httpx
+except ImportError:
+    # Only needed for the http2 backend
+    httpx = None
+
+# urllib3 1.26, which requests still allows, can decode br but not zstd
+URLLIB3_DECODES_ZSTD = int(urllib3.__version__.split('.')[0]) >= 2
+
+def supported_encodings(backend='requests'):
+    """Content codings the fetch backend can decode on this install, best first.
+
+    urllib3 2 and httpx both decode br and zstd transparently when brotli and
+    zstandard are installed, so those are only advertised when present.
+    """
+    encodings = []
+    if importlib.util.find_spec('zstandard') and (backend == 'http2' or URLLIB3_DECODES_ZSTD):
+        encodings.append('zstd')
+    if importlib.util.find_spec('brotli') or importlib.util.find_spec('brotlicffi'):
+        encodings.append('br')
+    encodings += ['gzip', 'deflate']
+    return ', '.join(encodings)
+
+# Headers for requests; make_session() sets Accept-Encoding for its backend
+REQUEST_HEADERS = {**HTTP_HEADERS, 'Accept-Encoding': supported_encodings()}
+
+# Compile regexes once at import time for efficiency
+MAILTO_PATTERN = re.compile(r'mailto:([^?&\s]+)')
+LOCAL_PART_PATTERN = re.compile(r'^[a-zA-Z0-9_.+-]+$')
+DOMAIN_PATTERN = re.compile(r'^[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+# Retina asset names like logo@2x.png produce a "domain" starting with 2x/3x
+RETINA_LABEL_PATTERN = re.compile(r'^\d+(\.\d+)?x$')
+ASSET_EXTENSIONS = frozenset(ext.lower() for ext in EMAIL_EXTRACTION_CONFIG['asset_extensions'])
 
 def validate_url(url):
     try:
@@ -47,33 +105,206 @@ def validate_url(url):
         return False
 
 def validate_email(email):
-    pattern = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
-    return re.match(pattern, email) is not None
+    return normalize_email(email, validate=True) is not None
+
+@lru_cache(maxsize=65536)
+def normalize_domain(domain, validate=True):
+    """Return the lower-case ASCII form of an email domain, or None if it is not a real domain.
+
+    With validate=False the domain is only normalized, never rejected.
+    Results are cached because the same few domains repeat across a crawl.
+    """
+    domain = domain.strip().rstrip('.').lower()
+    if not domain.isascii():
+        try:
+            # IDNA 2008 with UTS 46 mapping; the stdlib codec is IDNA 2003 and
+            # would map e.g. straße.de to the unrelated domain strasse.de
+            domain = idna.encode(domain, uts46=True).decode('ascii')
+        except (idna.IDNAError, UnicodeError):
+            return None if validate else domain
+
+    if not validate:
+        return domain
+    if not DOMAIN_PATTERN.match(domain):
+        return None
+
+    labels = domain.split('.')
+    if any(len(label) > 63 for label in labels):
+        return None
+    tld = labels[-1]
+    if EMAIL_EXTRACTION_CONFIG['filter_assets']:
+        if tld in ASSET_EXTENSIONS or RETINA_LABEL_PATTERN.match(labels[0]):
+            return None
+    if EMAIL_EXTRACTION_CONFIG['check_tld'] and tld not in TLDS:
+        return None
+    return domain
+
+def normalize_email(email, case_sensitive=None, validate=None):
+    """Normalize a single candidate email, returning None if it is not valid.
+
+    validate defaults to EMAIL_EXTRACTION_CONFIG['validate_emails']; when it
+    is off, only addresses without an '@' are rejected.
+    """
+    if case_sensitive is None:
+        case_sensitive = EMAIL_EXTRACTION_CONFIG['case_sensitive']
+    if validate is None:
+        validate = EMAIL_EXTRACTION_CONFIG['validate_emails']
+
+    local, sep, domain = urllib.parse.unquote(email).strip().rpartition('@')
+    if not sep or (validate and not LOCAL_PART_PATTERN.match(local)):
+        return None
+
+    domain = normalize_domain(domain, validate)
+    if domain is None:
+        return None
 
-def extract_emails_from_text(soup):
+    if not case_sensitive:
+        local = local.lower()
+    return f"{local}@{domain}"
+
+def normalize_emails(candidates, case_sensitive=None, validate=None):
+    """Normalize and validate a batch of candidate emails.
+
+    Raw duplicates are collapsed before any work is done and the result is
+    deduplicated on the normalized form, so John@X.com and john@x.com are
+    only returned once unless case_sensitive is enabled.
+    """
     emails = set()
-    # Compile regex once for efficiency
-    email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+    for candidate in set(candidates):
+        email = normalize_email(candidate, case_sensitive, validate)
+        if email is not None:
+            emails.add(email)
+    return emails
+
+# Linear-time replacement for EMAIL_PATTERNS['basic'], which backtracked
+# quadratically on long dotted runs (minified JS, base64). The lookbehind
+# only lets a match start at the beginning of a run of local-part characters,
+# and every quantifier is bounded by the RFC length limits, so each attempt
+# does a bounded amount of work. Runs longer than the limits cannot match.
+# RE2 would also be linear but does not support the lookbehind.
+EMAIL_PATTERN = re.compile(
+    r'(?<![A-Za-z0-9._%+-])[.%+-]{0,64}'
+    r'([A-Za-z0-9_][A-Za-z0-9._%+-]{0,63}@[A-Za-z0-9.-]{1,253}\.[A-Za-z]{2,63})\b'
+)
+
+class ScanBudget:
+    """Wall-clock allowance for scanning one page's text for emails"""
+
+    def __init__(self, seconds=None):
+        if seconds is None:
+            seconds = EMAIL_EXTRACTION_CONFIG['scan_budget_seconds']
+        self.deadline = time.perf_counter() + seconds if seconds else None
+        self.exhausted = False
+
+    def expired(self):
+        if not self.exhausted and self.deadline is not None and time.perf_counter() > self.deadline:
+            self.exhausted = True
+        return self.exhausted
+
+# Text is scanned in windows so the budget is checked even when nothing matches
+SCAN_WINDOW = 64 * 1024
+# Upper bound on how far past its start a single match attempt can look
+MATCH_REACH = 512
+# Characters that can never be part of an address; one always forms a word boundary
+SEPARATOR_PATTERN = re.compile(r'[^\w.%+@-]')
+# The last separator in a string (each run after a separator is scanned once)
+LAST_SEPARATOR_PATTERN = re.compile(r'[^\w.%+@-](?=[\w.%+@-]*\Z)')
+
+def _scan_unbroken_run(text, pos, end, emails):
+    """Collect matches in text[pos:end] that start at least MATCH_REACH before end.
+
+    Later matches might be cut short by end, so the caller rescans from the
+    returned position once text past end is available.
+    """
+    safe = end - MATCH_REACH
+    resume = safe
+    for match in EMAIL_PATTERN.finditer(text, pos, end):
+        if match.start() > safe:
+            break
+        emails.append(match.group(1))
+        resume = max(resume, match.end())
+    return resume
+
+def find_emails(text, budget=None, pos=0, endpos=None):
+    """Find email addresses in text in time linear in its length, stopping early if the budget expires.
+
+    pos and endpos limit the scan like they do for re.findall.
+    """
+    emails = []
+    if '@' not in text:
+        return emails
+
+    length = len(text) if endpos is None else endpos
+    while pos < length:
+        if budget is not None and budget.expired():
+            break
+        end = pos + SCAN_WINDOW
+        if end >= length:
+            # Leading punctuation in the run is matched but not part of the address
+            emails.extend(EMAIL_PATTERN.findall(text, pos, length))
+            break
+
+        separator = SEPARATOR_PATTERN.search(text, end, min(end + MATCH_REACH, length))
+        if separator is not None:
+            # No address spans a separator, so the window can simply end there
+            emails.extend(EMAIL_PATTERN.findall(text, pos, separator.start()))
+            pos = separator.start()
+            continue
+
+        # One unbroken run: matches near the window end are found again by the
+        # next, overlapping window
+        pos = _scan_unbroken_run(text, pos, end, emails)
+    return emails
+
+def find_complete_emails(text, budget=None, pos=0):
+    """Find the emails in text[pos:] that appending more text cannot change.
+
+    Used on text that is still arriving. Returns (emails, resume), where
+    resume is the position to continue scanning from once more text is
+    appended.
+    """
+    length = len(text)
+    tail = LAST_SEPARATOR_PATTERN.search(text, max(pos, length - MATCH_REACH))
+    if tail is not None:
+        # Nothing after the last separator can be part of an address before it
+        return find_emails(text, budget, pos, tail.start()), tail.start()
+    if length - MATCH_REACH <= pos or (budget is not None and budget.expired()):
+        return [], pos
+    emails = []
+    return emails, _scan_unbroken_run(text, pos, length, emails)
+
+def extract_emails_from_text(soup, budget=None, url=None):
+    emails = set()
+    if budget is None:
+        budget = ScanBudget()
     
     # Extract from all text content, not just paragraphs
     for text in soup.stripped_strings:
-        email_matches = email_pattern.findall(text)
+        if budget.expired():
+            break
+        email_matches = find_emails(text, budget)
         if email_matches:
             emails.update(email_matches)
     
     # Also check specific elements that commonly contain emails
     for element in soup.find_all(['span', 'div', 'td', 'th', 'li']):
+        if budget.expired():
+            break
         text = element.get_text()
-        email_matches = email_pattern.findall(text)
+        email_matches = find_emails(text, budget)
         if email_matches:
             emails.update(email_matches)
+
+    if budget.exhausted:
+        page = f" for {url}" if url else ""
+        logging.warning(f"Email scan budget of {EMAIL_EXTRACTION_CONFIG['scan_budget_seconds']}s exhausted{page}, rest of page skipped",
+                        extra={'url': url})
     
     return list(emails)
 
 def extract_emails_from_mailto(soup):
     emails = set()
-    # Compile regex once for efficiency
-    mailto_pattern = re.compile(r'mailto:([^?&\s]+)')
+    mailto_pattern = MAILTO_PATTERN
     
     for mailto_link in soup.select('a[href^="mailto:"]'):
         email = mailto_pattern.search(mailto_link['href'])
@@ -88,40 +319,184 @@ def extract_emails_from_mailto(soup):
     
     return list(emails)
 
+def normalize_link(href, base_url, base_domain):
+    """Turn an href into a clean same-domain URL, or None if it should not be crawled"""
+    # Skip if no href or is a fragment
+    if not href or href.startswith('#'):
+        return None
+
+    # Convert relative URLs to absolute
+    if href.startswith('/'):
+        full_url = urllib.parse.urljoin(base_url, href)
+    elif href.startswith('http'):
+        full_url = href
+    else:
+        full_url = urllib.parse.urljoin(base_url, href)
+
+    # Only include links from the same domain
+    try:
+        parsed = urllib.parse.urlparse(full_url)
+        if parsed.netloc == base_domain:
+            # Clean the URL (remove fragments, query params)
+            clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+            if clean_url.endswith('/'):
+                clean_url = clean_url[:-1]
+            return clean_url
+    except Exception:
+        pass
+    return None
+
 def extract_links_from_page(soup, base_url, domain):
     """Extract all internal links from a page for crawling"""
     links = set()
     base_domain = urllib.parse.urlparse(base_url).netloc
     
     for link in soup.find_all('a', href=True):
-        href = link['href']
-        
-        # Skip if no href or is a fragment
-        if not href or href.startswith('#'):
-            continue
-            
-        # Convert relative URLs to absolute
-        if href.startswith('/'):
-            full_url = urllib.parse.urljoin(base_url, href)
-        elif href.startswith('http'):
-            full_url = href
-        else:
-            full_url = urllib.parse.urljoin(base_url, href)
-        
-        # Only include links from the same domain
-        try:
-            parsed = urllib.parse.urlparse(full_url)
-            if parsed.netloc == base_domain:
-                # Clean the URL (remove fragments, query params)
-                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                if clean_url.endswith('/'):
-                    clean_url = clean_url[:-1]
-                links.add(clean_url)
-        except Exception:
-            continue
+        clean_url = normalize_link(link['href'], base_url, base_domain)
+        if clean_url:
+            links.add(clean_url)
     
     return list(links)
 
+class StreamingPageExtractor(HTMLParser):
+    """Incremental, feed-based extractor that never builds a DOM.
+
+    Chunks are passed to feed() as they arrive from the network. Emails found
+    in text, mailto links and data-email attributes are handed to on_email,
+    internal links to on_link, so results are available before the body has
+    finished downloading and memory stays bounded by the pending text buffer.
+    With scan_text=False only tags are inspected, for link discovery alone.
+    """
+
+    # Text inside these elements is not visible content (matches soup.stripped_strings)
+    SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+    # Text runs on across these tags, as in the soup path's element.get_text(),
+    # so obfuscations like info<span>@</span>example.com are still found
+    INLINE_TAGS = {
+        'a', 'abbr', 'b', 'bdi', 'bdo', 'cite', 'code', 'data', 'dfn', 'em', 'font', 'i', 'kbd',
+        'mark', 'q', 's', 'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'wbr',
+    }
+    # Flush pending text once it grows past this many characters
+    MAX_PENDING_TEXT = 64 * 1024
+
+    def __init__(self, base_url, on_email=None, on_link=None, scan_text=True):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.base_domain = urllib.parse.urlparse(base_url).netloc
+        self.on_email = on_email
+        self.on_link = on_link
+        self.scan_text = scan_text
+        self.emails = set()
+        self.links = set()
+        self._pending = []
+        self._pending_size = 0
+        self._scan_from = 0  # Start of the pending text not yet scanned
+        self._skip_depth = 0
+        self.budget = ScanBudget()
+
+    def handle_starttag(self, tag, attrs):
+        # Emails do not span block boundaries, so scan what we have so far
+        if tag not in self.INLINE_TAGS:
+            self._flush_text()
+        if tag in self.SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+
+        attrs = dict(attrs)
+        if tag == 'a':
+            href = attrs.get('href')
+            if href:
+                if href.startswith('mailto:'):
+                    match = MAILTO_PATTERN.search(href)
+                    if match:
+                        self._emit_email(match.group(1))
+                elif self.on_link is not None:
+                    clean_url = normalize_link(href, self.base_url, self.base_domain)
+                    if clean_url and clean_url not in self.links:
+                        self.links.add(clean_url)
+                        self.on_link(clean_url)
+
+        email = attrs.get('data-email')
+        if email and '@' in email:
+            self._emit_email(email)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in self.SKIP_TEXT_TAGS:
+            self._skip_depth -= 1
+
+    def handle_endtag(self, tag):
+        if tag not in self.INLINE_TAGS:
+            self._flush_text()
+        if tag in self.SKIP_TEXT_TAGS and self._skip_depth > 0:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or not self.scan_text:
+            return
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size > self.MAX_PENDING_TEXT:
+            self._flush_text(partial=True)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        if self.budget.exhausted:
+            logging.warning(f"Email scan budget exhausted for {self.base_url}, rest of page skipped", extra={'url': self.base_url})
+
+    def _flush_text(self, partial=False):
+        if not self._pending:
+            return
+        text = ''.join(self._pending)
+        if self.budget.expired():
+            emails, resume = [], len(text)
+        elif partial:
+            # The end of the text may be the start of an address still arriving
+            emails, resume = find_complete_emails(text, self.budget, self._scan_from)
+        else:
+            emails, resume = find_emails(text, self.budget, self._scan_from), len(text)
+        for email in emails:
+            self._emit_email(email)
+
+        if resume < len(text):
+            # Keep one character before the unscanned part for the lookbehind
+            keep = max(resume - 1, 0)
+            self._pending = [text[keep:]]
+            self._pending_size = len(text) - keep
+            self._scan_from = resume - keep
+        else:
+            self._pending = []
+            self._pending_size = 0
+            self._scan_from = 0
+
+    def _emit_email(self, email):
+        if email in self.emails:
+            return
+        self.emails.add(email)
+        if self.on_email is not None:
+            self.on_email(email)
+
+def stream_page(response, extractor, chunk_size=16 * 1024, capture=None):
+    """Feed a streamed response into an extractor chunk by chunk
+
+    If capture is a list, the raw chunks are also appended to it so the page
+    can be archived after extraction.
+    """
+    encoding = response.encoding or 'utf-8'
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            if capture is not None:
+                capture.append(chunk)
+            extractor.feed(decoder.decode(chunk))
+    extractor.feed(decoder.decode(b'', final=True))
+    extractor.close()
+    return extractor
+
 def check_robots_txt(domain):
     """Check robots.txt for crawling permissions"""
     try:
@@ -142,8 +517,437 @@ def can_crawl_url(robots_parser, url, user_agent="MailScraper/1.0"):
         return True
     return robots_parser.can_fetch(user_agent, url)
 
-def crawl_website(base_url, max_pages=50, max_depth=3, delay=1.0):
-    """Crawl an entire website to discover all pages"""
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of fetching when a host's circuit breaker is open"""
+
+class HostHealthTracker:
+    """Per-host latency tracking, adaptive timeouts and circuit breaking.
+
+    Read timeouts are derived from a percentile of the host's recent
+    response times, clamped between min_timeout and max_timeout, so a fast
+    host stops waiting the full default on a stalled page. After
+    failure_threshold consecutive failures a host's circuit opens and no
+    requests are sent to it for cooldown seconds; the first request after
+    that is a trial that either closes the circuit or re-opens it.
+    """
+
+    def __init__(self, max_timeout=30, min_timeout=5, connect_timeout=10, percentile=0.95,
+                 multiplier=3.0, min_samples=5, window=50, failure_threshold=3, cooldown=60):
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.connect_timeout = connect_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._latencies = {}  # host -> deque of recent response times
+        self._failures = {}   # host -> consecutive failures
+        self._open_until = {}  # host -> monotonic time the circuit may be retried
+        self._lock = threading.Lock()
+
+    def latency_percentile(self, host, percentile):
+        with self._lock:
+            samples = sorted(self._latencies.get(host, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+    def timeout_for(self, host):
+        """Return a (connect, read) timeout tuple for the host"""
+        observed = self.latency_percentile(host, self.percentile)
+        if observed is None:
+            read_timeout = self.max_timeout
+        else:
+            read_timeout = min(self.max_timeout, max(self.min_timeout, observed * self.multiplier))
+        return (min(self.connect_timeout, read_timeout), read_timeout)
+
+    def allow(self, host):
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return True
+            if time.monotonic() < open_until:
+                return False
+            # Half-open: let one trial request through and push the deadline
+            # out so concurrent callers keep waiting for its outcome
+            self._open_until[host] = time.monotonic() + self.cooldown
+            return True
+
+    def record_latency(self, host, latency):
+        with self._lock:
+            self._latencies.setdefault(host, deque(maxlen=self.window)).append(latency)
+
+    def record_success(self, host, latency=None):
+        if latency is not None:
+            self.record_latency(host, latency)
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                if host not in self._open_until:
+                    logging.warning(f"Circuit opened for {host} after {failures} consecutive failures")
+                self._open_until[host] = time.monotonic() + self.cooldown
+
+host_health = HostHealthTracker(
+    max_timeout=HOST_HEALTH_CONFIG['max_timeout'],
+    min_timeout=HOST_HEALTH_CONFIG['min_timeout'],
+    connect_timeout=HOST_HEALTH_CONFIG['connect_timeout'],
+    percentile=HOST_HEALTH_CONFIG['timeout_percentile'],
+    multiplier=HOST_HEALTH_CONFIG['timeout_multiplier'],
+    min_samples=HOST_HEALTH_CONFIG['min_samples'],
+    window=HOST_HEALTH_CONFIG['window'],
+    failure_threshold=HOST_HEALTH_CONFIG['failure_threshold'],
+    cooldown=HOST_HEALTH_CONFIG['cooldown'],
+)
+
+_hedge_executor = None
+_hedge_slots = None
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+def _submit_hedged(session, url, kwargs):
+    """Start a GET on the hedge pool, or return None if no worker is free.
+
+    Requests never queue behind busy workers, which may still be draining
+    losers of earlier races until their read timeout.
+    """
+    global _hedge_executor, _hedge_slots
+    if _hedge_executor is None:
+        workers = HOST_HEALTH_CONFIG['hedge_workers']
+        _hedge_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+        _hedge_slots = threading.BoundedSemaphore(workers)
+
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+    future = _hedge_executor.submit(session.get, url, **kwargs)
+    future.add_done_callback(lambda _: _hedge_slots.release())
+    return future
+
+def hedged_get(session, url, hedge_delay, on_primary_latency=None, **kwargs):
+    """GET url, sending a second identical request if the first is slower than hedge_delay.
+
+    Whichever request answers first wins; the loser is closed when it finishes.
+    No backup is sent while the hedge pool is saturated. on_primary_latency
+    is called with the first request's own response time once it finishes,
+    even if it lost, so latency statistics keep the tail the hedge hid.
+    """
+    start = time.perf_counter()
+    primary = _submit_hedged(session, url, kwargs)
+    if primary is None:
+        response = session.get(url, **kwargs)
+        if on_primary_latency is not None:
+            on_primary_latency(time.perf_counter() - start)
+        return response
+
+    if on_primary_latency is not None:
+        def report(future):
+            error = future.exception()
+            if error is None or isinstance(error, requests.Timeout):
+                on_primary_latency(time.perf_counter() - start)
+        primary.add_done_callback(report)
+
+    pending = {primary}
+    done, _ = wait(pending, timeout=hedge_delay)
+    if not done:
+        backup = _submit_hedged(session, url, kwargs)
+        if backup is not None:
+            pending.add(backup)
+
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending | (done - {future}):
+                    other.add_done_callback(_close_response)
+                return future.result()
+            error = future.exception()
+    raise error
+
+def fetch(session, url, stream=False, hedge=False):
+    """GET url using the host's adaptive timeout and circuit breaker"""
+    host = urllib.parse.urlparse(url).netloc
+    if not host_health.allow(host):
+        raise CircuitOpenError(f"circuit open for {host}, skipping request")
+
+    timeout = host_health.timeout_for(host)
+    hedge_delay = host_health.latency_percentile(host, HOST_HEALTH_CONFIG['hedge_percentile']) if hedge else None
+    start = time.perf_counter()
+    try:
+        if hedge_delay is not None:
+            # The primary request's latency is recorded, not the winner's
+            response = hedged_get(session, url, hedge_delay,
+                                  on_primary_latency=lambda latency: host_health.record_latency(host, latency),
+                                  timeout=timeout, allow_redirects=True, stream=stream)
+        else:
+            response = session.get(url, timeout=timeout, allow_redirects=True, stream=stream)
+    except requests.RequestException:
+        host_health.record_failure(host)
+        raise
+
+    if response.status_code >= 500 or response.status_code == 429:
+        host_health.record_failure(host)
+    elif hedge_delay is not None:
+        host_health.record_success(host)
+    else:
+        host_health.record_success(host, time.perf_counter() - start)
+    return response
+
+def _as_requests_error(error):
+    """Map an httpx error to the requests exception the scraper handles"""
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error))
+    return requests.RequestException(str(error))
+
+class Http2Response:
+    """Expose an httpx response through the parts of the requests.Response API the scraper uses"""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.encoding = response.charset_encoding
+        self.http_version = response.http_version
+        self.reason = response.reason_phrase
+        self.url = str(response.url)
+
+    @property
+    def text(self):
+        try:
+            self._response.read()
+        except httpx.HTTPError as e:
+            raise _as_requests_error(e) from e
+        return self._response.text
+
+    @property
+    def content(self):
+        try:
+            return self._response.read()
+        except httpx.HTTPError as e:
+            raise _as_requests_error(e) from e
+
+    def iter_content(self, chunk_size=1):
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.HTTPError as e:
+            raise _as_requests_error(e) from e
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+class Http2Session:
+    """Drop-in replacement for requests.Session backed by an HTTP/2 httpx.Client.
+
+    HTTP/2 is negotiated via ALPN on https URLs and falls back to HTTP/1.1.
+    Because one client is shared by every page, requests to the same host
+    are multiplexed over a single connection, including concurrent hedged
+    requests. With prior_knowledge=True plain http:// URLs also use HTTP/2
+    (h2c), which is mainly useful for local benchmarking.
+    """
+
+    # Connection-specific headers are forbidden in HTTP/2
+    HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'}
+
+    def __init__(self, prior_knowledge=False, verify=True):
+        if httpx is None:
+            raise ImportError("The http2 backend needs httpx. Please run: pip3 install 'httpx[http2]'")
+        self._client = httpx.Client(http2=True, http1=not prior_knowledge, verify=verify)
+        # httpx adds Connection: keep-alive by default; HTTP/1.1 keeps alive anyway
+        self._client.headers.pop('Connection', None)
+        self.headers = {}
+
+    def get(self, url, timeout=None, allow_redirects=True, stream=False):
+        if isinstance(timeout, tuple):
+            connect_timeout, read_timeout = timeout
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in self.HOP_BY_HOP_HEADERS}
+        try:
+            request = self._client.build_request('GET', url, headers=headers, timeout=timeout)
+            response = self._client.send(request, stream=stream, follow_redirects=allow_redirects)
+        except httpx.HTTPError as e:
+            raise _as_requests_error(e) from e
+        return Http2Response(response)
+
+    def close(self):
+        self._client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+FETCH_BACKENDS = ('requests', 'http2')
+
+def make_session(backend=None):
+    """Create an HTTP session for the given fetch backend with the scraper's headers"""
+    backend = backend or SCRAPING_CONFIG['backend']
+    if backend == 'http2':
+        session = Http2Session(verify=SCRAPING_CONFIG['verify_ssl'])
+    elif backend == 'requests':
+        session = requests.Session()
+    else:
+        raise ValueError(f"Unknown fetch backend: {backend}")
+    session.headers.update(REQUEST_HEADERS)
+    session.headers['Accept-Encoding'] = supported_encodings(backend)
+    return session
+
+class StageProfiler:
+    """CPU, sampling and allocation profiler for the fetch/parse/extract/write stages.
+
+    cProfile runs for the whole session and is dumped as a pstats file. A
+    background thread samples every other thread's stack and writes them in
+    the collapsed format used by flamegraph.pl and speedscope, rooted at the
+    stage that was active. tracemalloc tracks allocations so the largest
+    allocators can be reported when the run ends.
+    """
+
+    def __init__(self, output_dir, sample_interval=0.005, top_allocators=25, traceback_frames=10):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.top_allocators = top_allocators
+        self.traceback_frames = traceback_frames
+        # stage name -> [calls, wall seconds, cpu seconds, peak allocated bytes]
+        self.stage_stats = {}
+        self._stages = {}  # thread id -> stack of active stage names
+        self._samples = Counter()
+        self._stop_sampling = threading.Event()
+        self._sampler = None
+        self._cprofile = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tracemalloc.start(self.traceback_frames)
+        self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+        self._sampler.start()
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name):
+        stack = self._stages.setdefault(threading.get_ident(), [])
+        stack.append(name)
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            stats = self.stage_stats.setdefault(name, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start_wall
+            stats[2] += time.thread_time() - start_cpu
+            stats[3] = max(stats[3], tracemalloc.get_traced_memory()[1] - start_memory)
+            stack.pop()
+
+    def _sample_loop(self):
+        main_id = threading.main_thread().ident
+        while not self._stop_sampling.wait(self.sample_interval):
+            for thread_id, frame in sys._current_frames().items():
+                # Only sample scraper threads, not idle helpers like tqdm's monitor
+                if thread_id != main_id and thread_id not in self._stages:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                names.reverse()
+                stages = self._stages.get(thread_id)
+                if stages:
+                    names.insert(0, f"stage:{stages[-1]}")
+                self._samples[';'.join(names)] += 1
+
+    def stop(self):
+        """Stop profiling and write the pstats, collapsed-stack and allocation reports"""
+        self._cprofile.disable()
+        self._stop_sampling.set()
+        self._sampler.join()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        pstats_path = os.path.join(self.output_dir, 'scraper.pstats')
+        self._cprofile.dump_stats(pstats_path)
+
+        collapsed_path = os.path.join(self.output_dir, 'scraper.collapsed')
+        with open(collapsed_path, 'w') as file:
+            for stack, count in self._samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        summary_path = os.path.join(self.output_dir, 'allocations.txt')
+        with open(summary_path, 'w') as file:
+            file.write("Stage summary\n")
+            file.write(f"{'stage':<10} {'calls':>7} {'wall s':>10} {'cpu s':>10} {'peak KiB':>10}\n")
+            for name, (calls, wall, cpu, peak) in sorted(self.stage_stats.items(), key=lambda item: -item[1][1]):
+                file.write(f"{name:<10} {calls:>7} {wall:>10.3f} {cpu:>10.3f} {peak / 1024:>10.1f}\n")
+            file.write(f"\nTop {self.top_allocators} allocators still alive at exit\n")
+            for stat in snapshot.statistics('lineno')[:self.top_allocators]:
+                file.write(f"{stat}\n")
+
+        print(f"\n🔬 Profile written to {self.output_dir}/")
+        for name, (calls, wall, cpu, peak) in sorted(self.stage_stats.items(), key=lambda item: -item[1][1]):
+            print(f"   {name:<8} {calls:>5} calls  {wall:8.3f}s wall  {cpu:8.3f}s cpu  {peak / 1024:10.1f} KiB peak")
+        return pstats_path, collapsed_path, summary_path
+
+_profiler = None
+
+def start_profiling(output_dir=None):
+    """Enable stage profiling for the rest of the run"""
+    global _profiler
+    _profiler = StageProfiler(
+        output_dir or PROFILING_CONFIG['output_dir'],
+        sample_interval=PROFILING_CONFIG['sample_interval'],
+        top_allocators=PROFILING_CONFIG['top_allocators'],
+        traceback_frames=PROFILING_CONFIG['traceback_frames'],
+    )
+    _profiler.start()
+    return _profiler
+
+def stop_profiling():
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+        _profiler = None
+
+def profile_stage(name):
+    """Context manager marking a pipeline stage; free when profiling is off"""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.stage(name)
+
+def crawl_website(base_url, max_pages=50, max_depth=3, delay=1.0, stream=False, hedge=False, session=None,
+                  unique_emails=None, archive=None):
+    """Crawl an entire website to discover all pages
+
+    With stream=True pages are tokenized incrementally while they download
+    instead of being parsed into a full BeautifulSoup tree. If unique_emails
+    is also given, emails are saved (and pages archived) in that same pass,
+    so the discovered pages do not need to be fetched again; otherwise only
+    links are collected. With hedge=True
+    slow requests are raced against a second copy (see hedged_get). Pass a
+    session from make_session() to choose the fetch backend.
+    """
     print(f"🕷️  Starting website crawl for: {base_url}")
     print(f"   Max pages: {max_pages}, Max depth: {max_depth}, Delay: {delay}s")
     
@@ -160,18 +964,7 @@ def crawl_website(base_url, max_pages=50, max_depth=3, delay=1.0):
     visited = set()
     discovered_pages = []
     
-    # Headers for requests
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (compatible; MailScraper/1.0)',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-    }
-    
-    with requests.Session() as session:
-        session.headers.update(headers)
-        
+    with (nullcontext(session) if session is not None else make_session()) as session:
         while to_visit and len(discovered_pages) < max_pages:
             current_url, depth = to_visit.popleft()
             
@@ -192,22 +985,46 @@ def crawl_website(base_url, max_pages=50, max_depth=3, delay=1.0):
             try:
                 print(f"🔍 Crawling depth {depth}: {current_url}")
                 
-                response = session.get(current_url, timeout=30, allow_redirects=True)
-                
-                if response.status_code == 200 and 'text/html' in response.headers.get('content-type', ''):
-                    discovered_pages.append(current_url)
-                    visited.add(current_url)
-                    
-                    # Parse the page
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract new links for crawling
-                    if depth < max_depth:
-                        new_links = extract_links_from_page(soup, current_url, domain)
-                        for link in new_links:
+                with profile_stage('fetch'):
+                    response = fetch(session, current_url, stream=stream, hedge=hedge)
+
+                with response:
+                    is_html = response.status_code == 200 and 'text/html' in response.headers.get('content-type', '')
+                    if is_html:
+                        discovered_pages.append(current_url)
+                        visited.add(current_url)
+
+                        def enqueue(link):
                             if link not in visited and link not in [url for url, _ in to_visit]:
                                 to_visit.append((link, depth + 1))
-                    
+
+                        if stream:
+                            # Links are queued as soon as the tokenizer sees them
+                            on_link = enqueue if depth < max_depth else None
+                            if unique_emails is not None:
+                                chunks = [] if archive is not None else None
+                                _, new_emails = stream_emails(response, current_url, unique_emails,
+                                                              capture=chunks, on_link=on_link)
+                                if archive is not None:
+                                    with profile_stage('archive'):
+                                        archive.write_response(response, b''.join(chunks))
+                                logging.info(f"Scraped {len(new_emails)} new unique emails from {current_url}", extra={'url': current_url})
+                            else:
+                                with profile_stage('stream'):
+                                    stream_page(response, StreamingPageExtractor(current_url, on_link=on_link, scan_text=False))
+                        else:
+                            # Parse the page
+                            with profile_stage('parse'):
+                                soup = BeautifulSoup(response.text, 'html.parser')
+
+                            # Extract new links for crawling
+                            if depth < max_depth:
+                                with profile_stage('extract'):
+                                    new_links = extract_links_from_page(soup, current_url, domain)
+                                for link in new_links:
+                                    enqueue(link)
+
+                if is_html:
                     # Respect delay
                     if delay > 0:
                         time.sleep(delay)
@@ -224,154 +1041,621 @@ def crawl_website(base_url, max_pages=50, max_depth=3, delay=1.0):
     print(f"🎯 Crawl completed! Discovered {len(discovered_pages)} pages")
     return discovered_pages
 
-def scrape_website(url, unique_emails):
+def save_email(email, unique_emails, file):
+    """Write a normalized email to the output file if it has not been seen before"""
+    if email not in unique_emails:
+        file.write(email + '\n')
+        unique_emails.add(email)
+        return True
+    return False
+
+def extract_emails_from_html(html, url=None):
+    """Run the BeautifulSoup extraction pipeline on a page.
+
+    Returns the raw candidates and the normalized, validated set.
+    """
+    with profile_stage('parse'):
+        soup = BeautifulSoup(html, 'html.parser')
+
+    with profile_stage('extract'):
+        # Extract emails from on-screen text using BeautifulSoup
+        text_emails = extract_emails_from_text(soup, url=url)
+
+        # Extract emails from mailto links using BeautifulSoup
+        mailto_emails = extract_emails_from_mailto(soup)
+
+        # Combine the two sets of emails and remove duplicates
+        all_emails = list(set(text_emails + mailto_emails))
+        valid_emails = normalize_emails(all_emails)
+
+    return all_emails, valid_emails
+
+def parse_emails(response, unique_emails, url=None):
+    """Parse a fully downloaded page and save its new emails"""
+    all_emails, valid_emails = extract_emails_from_html(response.text, url)
+
+    # Filter and save only new, valid emails
+    new_emails = []
+    if valid_emails:
+        with profile_stage('write'), open('emails.txt', 'a') as file:
+            for email in valid_emails:
+                if save_email(email, unique_emails, file):
+                    new_emails.append(email)
+
+    return all_emails, new_emails
+
+def stream_emails(response, url, unique_emails, capture=None, on_link=None):
+    """Extract emails while the page downloads, saving each one as soon as it is seen"""
+    new_emails = []
+    with open('emails.txt', 'a') as file:
+        def on_email(email):
+            email = normalize_email(email)
+            if email is not None and save_email(email, unique_emails, file):
+                file.flush()
+                new_emails.append(email)
+
+        # Fetching, parsing, extraction and writing are interleaved in this mode
+        with profile_stage('stream'):
+            extractor = stream_page(response, StreamingPageExtractor(url, on_email=on_email, on_link=on_link), capture=capture)
+
+    return list(extractor.emails), new_emails
+
+class PageArchive:
+    """Append-only, gzip-compressed WARC/1.0 writer for captured pages.
+
+    Every record is its own gzip member, so files can be appended to,
+    concatenated and read back with any WARC tool. Payloads are stored as
+    the scraper saw them (already content-decoded), with Content-Encoding
+    and Content-Length rewritten to match. Files roll over at max_file_size.
+    """
+
+    # Headers that no longer describe the stored, decoded payload
+    STRIPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+    def __init__(self, directory, max_file_size=1024 * 1024 * 1024, compress_level=6):
+        self.directory = directory
+        self.max_file_size = max_file_size
+        self.compress_level = compress_level
+        self._file = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_next_file(self):
+        if self._file is not None:
+            self._file.close()
+        stamp = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        path = os.path.join(self.directory, f"capture-{stamp}-{os.getpid()}-{self._sequence:05d}.warc.gz")
+        self._sequence += 1
+        self._file = open(path, 'ab')
+        info = f"software: MailScraper/1.0\r\nformat: WARC File Format 1.0\r\n".encode('utf-8')
+        self._write_record('warcinfo', 'application/warc-fields', info, {'WARC-Filename': os.path.basename(path)})
+
+    def _write_record(self, record_type, content_type, block, extra_headers):
+        headers = {
+            'WARC-Type': record_type,
+            'WARC-Record-ID': f"<urn:uuid:{uuid.uuid4()}>",
+            'WARC-Date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            **extra_headers,
+            'Content-Type': content_type,
+            'Content-Length': str(len(block)),
+        }
+        head = 'WARC/1.0\r\n' + ''.join(f"{name}: {value}\r\n" for name, value in headers.items()) + '\r\n'
+        record = head.encode('utf-8') + block + b'\r\n\r\n'
+        self._file.write(gzip.compress(record, compresslevel=self.compress_level))
+
+    def write_response(self, response, body):
+        """Archive a response whose (decoded) body has already been read"""
+        reason = getattr(response, 'reason', '') or ''
+        lines = [f"HTTP/1.1 {response.status_code} {reason}".rstrip()]
+        for name, value in response.headers.items():
+            if name.lower() not in self.STRIPPED_HEADERS:
+                lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        block = ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8', errors='replace') + body
+
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_file_size:
+                self._open_next_file()
+            self._write_record('response', 'application/http; msgtype=response', block,
+                               {'WARC-Target-URI': str(response.url)})
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+# A gzip member starts with the magic bytes and the deflate method
+GZIP_MEMBER_MAGIC = b'\x1f\x8b\x08'
+
+def _find_member_start(file, offset):
+    """Return the offset of the first WARC gzip member at or after offset, or None"""
+    while True:
+        file.seek(offset)
+        window = file.read(64 * 1024)
+        if not window:
+            return None
+        index = window.find(GZIP_MEMBER_MAGIC)
+        while index != -1:
+            # The magic bytes can occur inside compressed data, so check the
+            # candidate really starts a record
+            file.seek(offset + index)
+            decompressor = zlib.decompressobj(wbits=31)
+            try:
+                if decompressor.decompress(file.read(4096), 16).startswith(b'WARC/'):
+                    return offset + index
+            except zlib.error:
+                pass
+            index = window.find(GZIP_MEMBER_MAGIC, index + 1)
+        # Keep a partial magic at the end of the window
+        offset += max(1, len(window) - len(GZIP_MEMBER_MAGIC) + 1)
+
+def _iter_gzip_members(file, start=0, end=None):
+    """Yield the decompressed contents of each gzip member beginning in [start, end)"""
+    offset = _find_member_start(file, start) if start else 0
+    if offset is None:
+        return
+    file.seek(offset)
+    data = file.read(256 * 1024)
+    while data and (end is None or offset < end):
+        decompressor = zlib.decompressobj(wbits=31)
+        parts = [decompressor.decompress(data)]
+        while not decompressor.eof:
+            data = file.read(256 * 1024)
+            if not data:
+                logging.warning(f"Truncated gzip member at offset {offset} in {file.name}")
+                return
+            parts.append(decompressor.decompress(data))
+        # Whatever followed the member is the start of the next one
+        data = decompressor.unused_data or file.read(256 * 1024)
+        offset = file.tell() - len(data)
+        yield b''.join(parts)
+
+def _iter_records(file):
+    """Yield (url, status, headers, body) for each response record in an uncompressed WARC stream"""
+    while True:
+        line = file.readline()
+        if not line:
+            return
+        if not line.strip():
+            continue
+
+        warc_headers = {}
+        for line in iter(file.readline, b'\r\n'):
+            if not line:
+                return
+            name, _, value = line.decode('utf-8', errors='replace').partition(':')
+            warc_headers[name.strip().lower()] = value.strip()
+        block = file.read(int(warc_headers.get('content-length', 0)))
+
+        if warc_headers.get('warc-type') != 'response':
+            continue
+        head, _, body = block.partition(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('iso-8859-1').split('\r\n')
+        parts = status_line.split(' ', 2)
+        status = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+        headers = {}
+        for header in header_lines:
+            name, _, value = header.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        yield warc_headers.get('warc-target-uri'), status, headers, body
+
+def iter_archive(path, start=0, end=None):
+    """Yield (url, status, headers, body) for each response record in a WARC file.
+
+    For .warc.gz files only records whose gzip member begins in the byte
+    range [start, end) are read, so one file can be split across workers.
+    """
+    with open(path, 'rb') as file:
+        if not path.endswith('.gz'):
+            yield from _iter_records(file)
+            return
+        for member in _iter_gzip_members(file, start, end):
+            yield from _iter_records(io.BytesIO(member))
+
+def replay_archive(path, stream=False, start=0, end=None):
+    """Re-run extraction over every archived HTML page in one file or byte range of it.
+
+    Runs in a worker process during --replay; returns (pages processed,
+    set of normalized emails).
+    """
+    pages = 0
+    emails = set()
+    for url, status, headers, body in iter_archive(path, start, end):
+        if status != 200 or 'text/html' not in headers.get('content-type', 'text/html'):
+            continue
+        pages += 1
+        encoding = requests.utils.get_encoding_from_headers(headers) or 'utf-8'
+        try:
+            html = body.decode(encoding, errors='replace')
+        except LookupError:
+            html = body.decode('utf-8', errors='replace')
+
+        if stream:
+            extractor = StreamingPageExtractor(url or 'http://archive.invalid/')
+            extractor.feed(html)
+            extractor.close()
+            emails.update(normalize_emails(extractor.emails))
+        else:
+            emails.update(extract_emails_from_html(html, url)[1])
+    return pages, emails
+
+def find_archives(paths):
+    """Expand files and directories into a sorted list of archive files"""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(('.warc', '.warc.gz')):
+                    archives.append(os.path.join(path, name))
+        else:
+            archives.append(path)
+    return archives
+
+def split_archives(archives, parts):
+    """Cut archive files into about `parts` (path, start, end) byte ranges of similar size.
+
+    Compressed files are split on record boundaries by iter_archive; plain
+    .warc files are always replayed whole.
+    """
+    total = sum(os.path.getsize(path) for path in archives)
+    split_size = max(ARCHIVE_CONFIG['min_replay_split'], total // max(1, parts) + 1)
+    tasks = []
+    for path in archives:
+        size = os.path.getsize(path)
+        if not path.endswith('.gz'):
+            tasks.append((path, 0, None))
+            continue
+        for start in range(0, max(size, 1), split_size):
+            tasks.append((path, start, start + split_size if start + split_size < size else None))
+    return tasks
+
+class _ForwardToRootHandler(logging.Handler):
+    """Hand records received from worker processes to this process's loggers"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+def _init_replay_worker(log_queue, level):
+    """Send a replay worker's log records to the parent, whose queue handler has no listener here"""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(TracebackQueueHandler(log_queue))
+    root.setLevel(level)
+
+def replay_archives(paths, unique_emails, stream=False, workers=None):
+    """Extract emails from captured archives in parallel, without touching the network"""
+    archives = find_archives(paths)
+    if not archives:
+        print("No archive files found")
+        return 0
+
+    workers = workers or os.cpu_count() or 1
+    # A few ranges per worker keeps them all busy when ranges differ in cost
+    tasks = split_archives(archives, workers * 4)
+    print(f"📼 Replaying {len(archives)} archive files in {len(tasks)} parts...")
+    total_pages = 0
+    log_queue = multiprocessing.Queue()
+    log_listener = logging.handlers.QueueListener(log_queue, _ForwardToRootHandler())
+    log_listener.start()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_replay_worker,
+                                 initargs=(log_queue, logging.getLogger().level)) as executor, \
+                open('emails.txt', 'a') as file:
+            futures = {executor.submit(replay_archive, path, stream, start, end): path
+                       for path, start, end in tasks}
+            with tqdm(total=len(futures), desc="Replaying archives") as pbar:
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        pages, emails = future.result()
+                    except Exception as e:
+                        logging.error(f"Error replaying {path}: {e}")
+                        print(f"Error replaying {path}: {e}")
+                    else:
+                        total_pages += pages
+                        new_emails = sum(save_email(email, unique_emails, file) for email in sorted(emails))
+                        logging.info(f"Replayed {pages} pages from {path}, {new_emails} new unique emails")
+                    pbar.update(1)
+    finally:
+        log_listener.stop()
+
+    print(f"📄 Re-extracted {total_pages} archived pages")
+    return total_pages
+
+def scrape_website(url, unique_emails, stream=False, hedge=False, session=None, archive=None):
     try:
-        print(f"Scraping {url} using requests and BeautifulSoup...")
-        logging.info(f"Attempting to scrape {url} using requests and BeautifulSoup...")
+        print(f"Scraping {url}...")
+        logging.info(f"Attempting to scrape {url}...", extra={'url': url})
 
         # Use requests with session for connection pooling and better performance
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (compatible; MailScraper/1.0)',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-            }
-            
-            # Use session for connection pooling
-            with requests.Session() as session:
-                session.headers.update(headers)
-                response = session.get(url, timeout=30, allow_redirects=True)
-                
-                if response.status_code == 200:
-                    page_content = response.text
-                    soup = BeautifulSoup(page_content, 'html.parser')
-
-                    # Extract emails from on-screen text using BeautifulSoup
-                    text_emails = extract_emails_from_text(soup)
-
-                    # Extract emails from mailto links using BeautifulSoup
-                    mailto_emails = extract_emails_from_mailto(soup)
-
-                    # Combine the two sets of emails and remove duplicates
-                    all_emails = list(set(text_emails + mailto_emails))
-
-                    if all_emails:
-                        # Filter and save only new, valid emails
-                        new_emails = []
-                        with open('emails.txt', 'a') as file:
-                            for email in all_emails:
-                                if email not in unique_emails and validate_email(email):
-                                    file.write(email + '\n')
-                                    unique_emails.add(email)
-                                    new_emails.append(email)
-
-                        print(f"Scraping successful. {len(new_emails)} new unique emails found and saved to 'emails.txt'")
-                        logging.info(f"Scraped {len(new_emails)} new unique emails from {url}")
+            # Reuse the caller's session so pages share pooled (or multiplexed) connections
+            with (nullcontext(session) if session is not None else make_session()) as session:
+                with profile_stage('fetch'):
+                    response = fetch(session, url, stream=stream, hedge=hedge)
+
+                with response:
+                    if response.status_code == 200:
+                        if stream:
+                            chunks = [] if archive is not None else None
+                            all_emails, new_emails = stream_emails(response, url, unique_emails, capture=chunks)
+                        else:
+                            all_emails, new_emails = parse_emails(response, unique_emails, url)
+
+                        if archive is not None:
+                            with profile_stage('archive'):
+                                archive.write_response(response, b''.join(chunks) if stream else response.content)
+
+                        if all_emails:
+                            print(f"Scraping successful. {len(new_emails)} new unique emails found and saved to 'emails.txt'")
+                            logging.info(f"Scraped {len(new_emails)} new unique emails from {url}", extra={'url': url})
+                        else:
+                            print("No emails found on the given website.")
+                            logging.info(f"No emails found on {url}", extra={'url': url})
                     else:
-                        print("No emails found on the given website.")
-                        logging.info(f"No emails found on {url}")
-                else:
-                    print(f"Failed to fetch {url}. Status code: {response.status_code}")
-                    logging.error(f"Failed to fetch {url}. Status code: {response.status_code}")
+                        print(f"Failed to fetch {url}. Status code: {response.status_code}")
+                        logging.error(f"Failed to fetch {url}. Status code: {response.status_code}", extra={'url': url})
         except requests.RequestException as e:
             print(f"Request failed for {url}: {e}")
-            logging.error(f"Request failed for {url}: {e}")
+            logging.error(f"Request failed for {url}: {e}", extra={'url': url})
 
     except Exception as e:
         print(f"Unexpected error: {e}")
         logging.error(f"Unexpected error: {e}")
 
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps a record's traceback apart from its message.
+
+    The stock prepare() folds the traceback into the message and clears
+    exc_info and exc_text, so formatters on the listener side could no
+    longer tell them apart. Here the traceback travels as exc_text.
+    """
+
+    def prepare(self, record):
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format log records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        url = getattr(record, 'url', None)
+        if url is not None:
+            entry['url'] = url
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Already rendered by TracebackQueueHandler
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class PerURLRateLimitFilter(logging.Filter):
+    """Let at most max_records records per URL through in each interval.
+
+    Only records logged with extra={'url': ...} are limited, and warnings and
+    errors always pass. The first record of a new window reports how many
+    were dropped from the previous one.
+    """
+
+    def __init__(self, max_records=20, interval=60.0):
+        super().__init__()
+        self.max_records = max_records
+        self.interval = interval
+        self._windows = {}  # url -> [window start, records passed, records suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        url = getattr(record, 'url', None)
+        if url is None or record.levelno >= logging.WARNING:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(url)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                if len(self._windows) > 10000:
+                    self._prune(now)
+                self._windows[url] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+                    record.args = None
+                return True
+            if window[1] < self.max_records:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def _prune(self, now):
+        expired = [url for url, window in self._windows.items() if now - window[0] >= self.interval]
+        for url in expired:
+            del self._windows[url]
+
+def setup_logging(json_lines=None):
+    """Send log records through a queue to a background rotating-file writer.
+
+    Workers only pay for an enqueue; formatting and disk I/O happen on the
+    listener thread. Returns the listener, which must be stopped to flush.
+    """
+    if json_lines is None:
+        json_lines = LOGGING_CONFIG['json']
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOGGING_CONFIG['file'],
+        maxBytes=LOGGING_CONFIG['max_file_size'],
+        backupCount=LOGGING_CONFIG['backup_count'],
+        encoding='utf-8',
+    )
+    if json_lines:
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(LOGGING_CONFIG['format']))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = TracebackQueueHandler(log_queue)
+    queue_handler.addFilter(PerURLRateLimitFilter(
+        max_records=LOGGING_CONFIG['rate_limit_per_url'],
+        interval=LOGGING_CONFIG['rate_limit_interval'],
+    ))
+
+    root = logging.getLogger()
+    root.setLevel(LOGGING_CONFIG['level'])
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
 def main():
     parser = argparse.ArgumentParser(description="Efficient email scraper with website crawling capabilities")
-    parser.add_argument("urls", nargs="+", help="URLs to scrape")
+    parser.add_argument("urls", nargs="+", help="URLs to scrape (archive files or directories with --replay)")
     parser.add_argument("--delay", type=float, default=1.0, help="Delay between requests (seconds)")
-    parser.add_argument("--timeout", type=int, default=30, help="Request timeout (seconds)")
+    parser.add_argument("--timeout", type=int, default=HOST_HEALTH_CONFIG['max_timeout'], help="Maximum request timeout; shorter timeouts are learned per host (seconds)")
+    parser.add_argument("--backend", choices=FETCH_BACKENDS, default=SCRAPING_CONFIG['backend'], help=f"HTTP client: requests (HTTP/1.1) or http2 (httpx, needs httpx[http2]) (default: {SCRAPING_CONFIG['backend']})")
+    parser.add_argument("--hedge", action="store_true", help="Send a second request when a page is slower than the host's usual latency")
     parser.add_argument("--crawl", action="store_true", help="Crawl entire website to find all pages")
     parser.add_argument("--max-pages", type=int, default=50, help="Maximum pages to crawl (default: 50)")
     parser.add_argument("--max-depth", type=int, default=3, help="Maximum crawl depth (default: 3)")
+    parser.add_argument("--stream", action="store_true", help="Extract emails and links incrementally while pages download")
+    parser.add_argument("--archive", metavar="DIR", help="Capture every scraped page to compressed WARC files in DIR")
+    parser.add_argument("--replay", action="store_true", help="Re-extract emails from captured WARC files instead of fetching")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --replay (default: CPU count)")
+    parser.add_argument("--log-json", action="store_true", help="Write the log file as JSON lines")
+    parser.add_argument("--profile", action="store_true", help="Profile CPU and allocations per stage and write reports at the end of the run")
+    parser.add_argument("--profile-dir", default=PROFILING_CONFIG['output_dir'], help=f"Directory for profile reports (default: {PROFILING_CONFIG['output_dir']})")
     args = parser.parse_args()
 
     # Validate URLs
-    valid_urls = [url for url in args.urls if validate_url(url)]
+    valid_urls = args.urls if args.replay else [url for url in args.urls if validate_url(url)]
     if not valid_urls:
         print("No valid URLs provided")
         return
 
-    logging.basicConfig(
-        filename='scraper.log', 
-        level=logging.INFO, 
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    log_listener = setup_logging(json_lines=args.log_json or None)
 
     unique_emails = set()  # Maintain a set to store unique emails
+    host_health.max_timeout = args.timeout
     
-    if args.crawl:
-        print("🕷️  Website crawling mode enabled!")
-        print("=" * 60)
+    try:
+        session = make_session(args.backend)
+    except ImportError as e:
+        print(f"Error: {e}")
+        log_listener.stop()
+        return
+
+    archive = None
+    if args.archive:
+        archive = PageArchive(
+            args.archive,
+            max_file_size=ARCHIVE_CONFIG['max_file_size'],
+            compress_level=ARCHIVE_CONFIG['compress_level'],
+        )
+
+    if args.profile:
+        start_profiling(args.profile_dir)
+
+    try:
+        if args.replay:
+            replay_archives(valid_urls, unique_emails, stream=args.stream, workers=args.workers)
+
+        elif args.crawl:
+            print("🕷️  Website crawling mode enabled!")
+            print("=" * 60)
         
-        for base_url in valid_urls:
-            print(f"\n🚀 Starting comprehensive crawl of: {base_url}")
+            for base_url in valid_urls:
+                print(f"\n🚀 Starting comprehensive crawl of: {base_url}")
             
-            # Crawl the website to discover all pages
-            discovered_pages = crawl_website(
-                base_url, 
-                max_pages=args.max_pages, 
-                max_depth=args.max_depth, 
-                delay=args.delay
-            )
+                # Crawl the website to discover all pages
+                discovered_pages = crawl_website(
+                    base_url, 
+                    max_pages=args.max_pages, 
+                    max_depth=args.max_depth, 
+                    delay=args.delay,
+                    stream=args.stream,
+                    hedge=args.hedge,
+                    session=session,
+                    unique_emails=unique_emails if args.stream else None,
+                    archive=archive if args.stream else None,
+                )
             
-            if discovered_pages:
-                print(f"\n📧 Now scraping emails from {len(discovered_pages)} discovered pages...")
+                if discovered_pages and args.stream:
+                    # Emails were already saved while the crawl streamed each page
+                    print(f"📧 Extracted emails from {len(discovered_pages)} pages while crawling")
+                elif discovered_pages:
+                    print(f"\n📧 Now scraping emails from {len(discovered_pages)} discovered pages...")
                 
-                with tqdm(total=len(discovered_pages), desc=f"Scraping {base_url}") as pbar:
-                    for page_url in discovered_pages:
-                        try:
-                            scrape_website(page_url, unique_emails)
-                            pbar.update(1)
+                    with tqdm(total=len(discovered_pages), desc=f"Scraping {base_url}") as pbar:
+                        for page_url in discovered_pages:
+                            try:
+                                scrape_website(page_url, unique_emails, stream=args.stream, hedge=args.hedge, session=session, archive=archive)
+                                pbar.update(1)
                             
-                            # Add delay between requests to be respectful
-                            if args.delay > 0 and page_url != discovered_pages[-1]:
-                                time.sleep(args.delay)
+                                # Add delay between requests to be respectful
+                                if args.delay > 0 and page_url != discovered_pages[-1]:
+                                    time.sleep(args.delay)
                                 
-                        except KeyboardInterrupt:
-                            print("\nScraping interrupted by the user.")
-                            break
-                        except Exception as e:
-                            logging.error(f"Error during scraping {page_url}: {e}")
-                            print(f"Error scraping {page_url}: {e}")
-                            pbar.update(1)
-            else:
-                print(f"❌ No pages discovered for {base_url}")
+                            except KeyboardInterrupt:
+                                print("\nScraping interrupted by the user.")
+                                break
+                            except Exception as e:
+                                logging.error(f"Error during scraping {page_url}: {e}", extra={'url': page_url})
+                                print(f"Error scraping {page_url}: {e}")
+                                pbar.update(1)
+                else:
+                    print(f"❌ No pages discovered for {base_url}")
                 
-    else:
-        print(f"📧 Single-page scraping mode for {len(valid_urls)} URLs...")
+        else:
+            print(f"📧 Single-page scraping mode for {len(valid_urls)} URLs...")
         
-        with tqdm(total=len(valid_urls), desc="Scraping URLs") as pbar:
-            for url in valid_urls:
-                try:
-                    scrape_website(url, unique_emails)
-                    pbar.update(1)
+            with tqdm(total=len(valid_urls), desc="Scraping URLs") as pbar:
+                for url in valid_urls:
+                    try:
+                        scrape_website(url, unique_emails, stream=args.stream, hedge=args.hedge, session=session, archive=archive)
+                        pbar.update(1)
                     
-                    # Add delay between requests to be respectful
-                    if args.delay > 0 and url != valid_urls[-1]:  # Don't delay after last URL
-                        time.sleep(args.delay)
+                        # Add delay between requests to be respectful
+                        if args.delay > 0 and url != valid_urls[-1]:  # Don't delay after last URL
+                            time.sleep(args.delay)
                         
-                except KeyboardInterrupt:
-                    print("\nScraping interrupted by the user.")
-                    break
-                except Exception as e:
-                    logging.error(f"Error during scraping {url}: {e}")
-                    print(f"Error scraping {url}: {e}")
-                    pbar.update(1)
+                    except KeyboardInterrupt:
+                        print("\nScraping interrupted by the user.")
+                        break
+                    except Exception as e:
+                        logging.error(f"Error during scraping {url}: {e}", extra={'url': url})
+                        print(f"Error scraping {url}: {e}")
+                        pbar.update(1)
+    finally:
+        stop_profiling()
+        session.close()
+        if archive is not None:
+            archive.close()
+        log_listener.stop()
     
     print(f"\n🎉 Scraping completed!")
     print(f"📊 Total unique emails found: {len(unique_emails)}")
     
     if unique_emails:
         print(f"📧 Emails saved to: emails.txt")
-        print(f"📝 Log file: scraper.log")
+        print(f"📝 Log file: {LOGGING_CONFIG['file']}")
 
 if __name__ == "__main__":
     main()
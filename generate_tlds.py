@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Regenerate tlds.py from the ICANN section of the Public Suffix List.
+
+Reads a local copy of public_suffix_list.dat (many distributions ship one in
+/usr/share/publicsuffix) or downloads the current list. Internationalized
+TLDs are written in their punycode form, one per line.
+"""
+
+import argparse
+import re
+
+import idna
+import requests
+
+PSL_URL = 'https://publicsuffix.org/list/public_suffix_list.dat'
+TLD_FORMAT = re.compile(r'[a-z0-9]+(-[a-z0-9]+)*|xn--[a-z0-9-]+')
+
+HEADER = '''"""
+Top-level domain index used to validate scraped email addresses.
+
+Generated from the ICANN section of the Public Suffix List
+(https://publicsuffix.org/list/public_suffix_list.dat) by generate_tlds.py.
+Internationalized TLDs are stored in their ASCII (punycode) form, one per
+line so an entry is never split by line wrapping. Re-run the generator when
+new TLDs need to be recognised.
+"""
+'''
+
+def parse_icann_tlds(text):
+    """Return the set of TLDs (last labels) of every rule in the ICANN section"""
+    tlds = set()
+    in_icann = False
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('// ===BEGIN ICANN DOMAINS==='):
+            in_icann = True
+        elif line.startswith('// ===END ICANN DOMAINS==='):
+            break
+        elif in_icann and line and not line.startswith('//'):
+            label = line.split('.')[-1].lstrip('!*')
+            tlds.add(label if label.isascii() else idna.encode(label, uts46=True).decode('ascii'))
+    return tlds
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate tlds.py from the Public Suffix List")
+    parser.add_argument("--psl", help="Local public_suffix_list.dat (default: download it)")
+    parser.add_argument("--output", default="tlds.py", help="File to write (default: tlds.py)")
+    args = parser.parse_args()
+
+    if args.psl:
+        with open(args.psl, encoding='utf-8') as file:
+            text = file.read()
+    else:
+        response = requests.get(PSL_URL, timeout=30)
+        response.raise_for_status()
+        text = response.text
+
+    tlds = parse_icann_tlds(text)
+    malformed = sorted(tld for tld in tlds if not TLD_FORMAT.fullmatch(tld))
+    if malformed:
+        print(f"Error: malformed TLDs in the list: {', '.join(malformed)}")
+        exit(1)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        file.write(HEADER + '\nTLDS = frozenset("""\n' + '\n'.join(sorted(tlds)) + '\n""".split())\n')
+    print(f"✅ Wrote {len(tlds)} TLDs to {args.output}")
+
+if __name__ == "__main__":
+    main()
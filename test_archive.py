@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Round-trip tests for the WARC page archive used by --archive and --replay.
+
+Run with: python3 -m unittest test_archive
+"""
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from config import ARCHIVE_CONFIG
+from es import (PageArchive, _iter_records, extract_emails_from_html, find_archives, iter_archive,
+                replay_archive, split_archives)
+
+class FakeResponse:
+    """The parts of a response PageArchive.write_response reads"""
+
+    def __init__(self, url, status_code=200, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = 'OK' if status_code == 200 else 'Not Found'
+        self.headers = headers or {}
+
+def build_page(number):
+    rows = ''.join(f'<li>member{number}.{row}@example.com &amp; more</li>' for row in range(40))
+    return (f'<html><head><meta charset="utf-8"><title>Page {number}</title></head>'
+            f'<body><p>Café contact: team{number}@example.org</p><ul>{rows}</ul>'
+            f'<a href="mailto:press{number}@example.com">Press</a></body></html>')
+
+class PageArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, 'warcs')
+        self.pages = {f'http://example.com/page/{number}': build_page(number) for number in range(30)}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_archive(self, max_file_size=1024 * 1024 * 1024):
+        archive = PageArchive(self.directory, max_file_size=max_file_size)
+        # Headers describe the encoded transfer; the archive stores the decoded body
+        headers = {'Content-Type': 'text/html; charset=utf-8', 'Content-Encoding': 'br',
+                   'Content-Length': '17', 'Transfer-Encoding': 'chunked', 'X-Served-By': 'test'}
+        for url, html in self.pages.items():
+            archive.write_response(FakeResponse(url, headers=headers), html.encode('utf-8'))
+        archive.write_response(FakeResponse('http://example.com/missing', 404, {'Content-Type': 'text/html'}), b'gone')
+        archive.close()
+        return find_archives([self.directory])
+
+    def test_round_trip_rewrites_headers(self):
+        [path] = self.write_archive()
+        records = {url: (status, headers, body) for url, status, headers, body in iter_archive(path)}
+
+        self.assertEqual(set(records), set(self.pages) | {'http://example.com/missing'})
+        for url, html in self.pages.items():
+            status, headers, body = records[url]
+            self.assertEqual(status, 200)
+            self.assertEqual(body, html.encode('utf-8'))
+            self.assertEqual(headers['content-length'], str(len(body)))
+            self.assertEqual(headers['x-served-by'], 'test')
+            self.assertNotIn('content-encoding', headers)
+            self.assertNotIn('transfer-encoding', headers)
+        self.assertEqual(records['http://example.com/missing'][0], 404)
+
+    def test_members_read_as_one_gzip_stream(self):
+        [path] = self.write_archive()
+        with gzip.open(path, 'rb') as file:
+            standard = list(_iter_records(io.BytesIO(file.read())))
+        self.assertEqual(standard, list(iter_archive(path)))
+
+    def test_replay_equals_live_extraction(self):
+        self.write_archive()
+        live = set()
+        for html in self.pages.values():
+            live |= extract_emails_from_html(html)[1]
+
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                pages, emails = 0, set()
+                for path in find_archives([self.directory]):
+                    file_pages, file_emails = replay_archive(path, stream)
+                    pages += file_pages
+                    emails |= file_emails
+                self.assertEqual(pages, len(self.pages))
+                self.assertEqual(emails, live)
+
+    def test_rollover_keeps_every_record(self):
+        archives = self.write_archive(max_file_size=8 * 1024)
+        self.assertGreater(len(archives), 1)
+        urls = [url for path in archives for url, *_ in iter_archive(path)]
+        self.assertEqual(sorted(urls), sorted(set(self.pages) | {'http://example.com/missing'}))
+
+    def test_byte_ranges_cover_each_record_once(self):
+        [path] = self.write_archive()
+        size = os.path.getsize(path)
+        everything = [url for url, *_ in iter_archive(path)]
+
+        # Arbitrary cut points land inside members and must resynchronize
+        for step in (97, 1000, size // 3):
+            with self.subTest(step=step):
+                urls = []
+                for start in range(0, size, step):
+                    urls += [url for url, *_ in iter_archive(path, start, start + step)]
+                self.assertEqual(urls, everything)
+
+        original = ARCHIVE_CONFIG['min_replay_split']
+        ARCHIVE_CONFIG['min_replay_split'] = 1024
+        try:
+            tasks = split_archives([path], 8)
+        finally:
+            ARCHIVE_CONFIG['min_replay_split'] = original
+        self.assertGreater(len(tasks), 1)
+        urls = [url for task in tasks for url, *_ in iter_archive(*task)]
+        self.assertEqual(urls, everything)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive timeouts, the circuit breaker and hedged requests, using
+a fake session instead of the network.
+
+Run with: python3 -m unittest test_host_health
+"""
+
+import threading
+import time
+import unittest
+
+import es
+from config import HOST_HEALTH_CONFIG
+from es import CircuitOpenError, HostHealthTracker, fetch, hedged_get
+
+HOST = 'example.com'
+URL = f'http://{HOST}/page'
+
+class FakeResponse:
+    def __init__(self, status_code=200, name=''):
+        self.status_code = status_code
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeSession:
+    """Answers each GET with the next (delay, status) from a script"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.responses = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        delay, status = self.script[min(index, len(self.script) - 1)]
+        time.sleep(delay)
+        response = FakeResponse(status, name=f'call {index}')
+        self.responses.append(response)
+        return response
+
+class TrackerTestCase(unittest.TestCase):
+    """Runs fetch() against a private tracker instead of the module-level one"""
+
+    def setUp(self):
+        self.tracker = HostHealthTracker(max_timeout=30, min_timeout=5, connect_timeout=10, percentile=0.95,
+                                         multiplier=3.0, min_samples=5, window=50, failure_threshold=3,
+                                         cooldown=0.2)
+        self.original_tracker = es.host_health
+        es.host_health = self.tracker
+
+    def tearDown(self):
+        es.host_health = self.original_tracker
+
+    def record(self, *latencies):
+        for latency in latencies:
+            self.tracker.record_success(HOST, latency)
+
+class TimeoutTest(TrackerTestCase):
+    def test_default_before_history(self):
+        self.record(0.1, 0.1)
+        self.assertEqual(self.tracker.timeout_for(HOST), (10, 30))
+
+    def test_clamped_to_min_timeout(self):
+        self.record(*[0.01] * 10)
+        self.assertEqual(self.tracker.timeout_for(HOST), (5, 5))
+
+    def test_clamped_to_max_timeout(self):
+        self.record(*[20] * 10)
+        self.assertEqual(self.tracker.timeout_for(HOST), (10, 30))
+
+    def test_scales_with_percentile(self):
+        self.record(*[2] * 10)
+        self.assertEqual(self.tracker.timeout_for(HOST), (6, 6))
+
+class CircuitBreakerTest(TrackerTestCase):
+    def open_circuit(self):
+        with self.assertLogs(level='WARNING'):
+            for _ in range(3):
+                self.assertTrue(self.tracker.allow(HOST))
+                self.tracker.record_failure(HOST)
+        self.assertFalse(self.tracker.allow(HOST))
+
+    def test_opens_after_threshold(self):
+        self.tracker.record_failure(HOST)
+        self.tracker.record_failure(HOST)
+        self.assertTrue(self.tracker.allow(HOST))
+        with self.assertLogs(level='WARNING') as logs:
+            self.tracker.record_failure(HOST)
+        self.assertIn('Circuit opened for example.com', logs.output[0])
+        self.assertFalse(self.tracker.allow(HOST))
+        self.assertTrue(self.tracker.allow('other.example.com'))
+
+    def test_success_resets_failure_count(self):
+        self.tracker.record_failure(HOST)
+        self.tracker.record_failure(HOST)
+        self.tracker.record_success(HOST)
+        self.tracker.record_failure(HOST)
+        self.assertTrue(self.tracker.allow(HOST))
+
+    def test_half_open_trial_closes_circuit(self):
+        self.open_circuit()
+        time.sleep(0.25)
+        self.assertTrue(self.tracker.allow(HOST))
+        # Only one trial request goes through while it is outstanding
+        self.assertFalse(self.tracker.allow(HOST))
+        self.tracker.record_success(HOST, 0.1)
+        self.assertTrue(self.tracker.allow(HOST))
+
+    def test_half_open_trial_failure_reopens(self):
+        self.open_circuit()
+        time.sleep(0.25)
+        self.assertTrue(self.tracker.allow(HOST))
+        self.tracker.record_failure(HOST)
+        self.assertFalse(self.tracker.allow(HOST))
+
+class FetchAccountingTest(TrackerTestCase):
+    def test_server_errors_and_429_are_failures(self):
+        with self.assertLogs(level='WARNING'):
+            for status in (503, 429, 500):
+                fetch(FakeSession((0, status)), URL)
+        with self.assertRaises(CircuitOpenError):
+            fetch(FakeSession((0, 200)), URL)
+
+    def test_client_errors_are_not_failures(self):
+        session = FakeSession((0, 404))
+        for _ in range(5):
+            self.assertEqual(fetch(session, URL).status_code, 404)
+        self.assertEqual(session.calls, 5)
+        self.assertIsNotNone(self.tracker.latency_percentile(HOST, 0.5))
+
+class HedgingTest(TrackerTestCase):
+    def test_hedge_wins_and_primary_latency_is_recorded(self):
+        self.record(*[0.02] * 10)
+        session = FakeSession((0.5, 200), (0, 200))
+
+        start = time.perf_counter()
+        response = fetch(session, URL, hedge=True)
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(response.name, 'call 1')
+
+        time.sleep(0.6)  # let the losing primary finish
+        slowest = self.tracker.latency_percentile(HOST, 1.0)
+        self.assertGreaterEqual(slowest, 0.45)
+        [loser] = [r for r in session.responses if r.name == 'call 0']
+        self.assertTrue(loser.closed)
+
+    def test_saturated_pool_runs_inline_without_backup(self):
+        release = threading.Event()
+        blocker = type('Blocker', (), {'get': lambda self, url, **kwargs: release.wait(5)})()
+        fillers = [es._submit_hedged(blocker, URL, {}) for _ in range(HOST_HEALTH_CONFIG['hedge_workers'])]
+        try:
+            self.assertTrue(all(filler is not None for filler in fillers))
+            self.assertIsNone(es._submit_hedged(blocker, URL, {}))
+
+            latencies = []
+            session = FakeSession((0.2, 200), (0, 200))
+            response = hedged_get(session, URL, 0.01, on_primary_latency=latencies.append)
+            self.assertEqual(response.name, 'call 0')
+            self.assertEqual(session.calls, 1)
+            self.assertEqual(len(latencies), 1)
+            self.assertGreaterEqual(latencies[0], 0.2)
+        finally:
+            release.set()
+            # Slots are freed by done callbacks, which can run after result() returns
+            slots = HOST_HEALTH_CONFIG['hedge_workers']
+            for _ in range(slots):
+                self.assertTrue(es._hedge_slots.acquire(timeout=5))
+            for _ in range(slots):
+                es._hedge_slots.release()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the http2 fetch backend adapter (Http2Session/Http2Response),
+using an httpx mock transport instead of a server.
+
+Run with: python3 -m unittest test_http2
+"""
+
+import unittest
+
+import requests
+
+from config import HTTP_HEADERS
+from es import REQUEST_HEADERS, Http2Session, httpx, make_session
+
+def mock_session(handler):
+    session = Http2Session()
+    session._client.close()
+    session._client = httpx.Client(transport=httpx.MockTransport(handler))
+    session._client.headers.pop('Connection', None)
+    return session
+
+class FailingStream(httpx.SyncByteStream if httpx else object):
+    """A body that breaks off after the first chunk"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def __iter__(self):
+        yield b'<html>partial'
+        raise self.error
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class Http2SessionTest(unittest.TestCase):
+    def test_hop_by_hop_headers_are_stripped(self):
+        seen = {}
+
+        def handler(request):
+            seen.update(request.headers)
+            return httpx.Response(200, text='ok')
+
+        with mock_session(handler) as session:
+            session.headers.update(REQUEST_HEADERS)
+            session.headers.update({'Keep-Alive': 'timeout=5', 'Upgrade': 'h2c', 'Proxy-Connection': 'keep-alive',
+                                    'Transfer-Encoding': 'chunked'})
+            session.get('https://example.com/')
+
+        for name in Http2Session.HOP_BY_HOP_HEADERS:
+            self.assertNotIn(name, seen)
+        self.assertEqual(seen['user-agent'], REQUEST_HEADERS['User-Agent'])
+        self.assertEqual(seen['accept-language'], REQUEST_HEADERS['Accept-Language'])
+
+    def test_timeout_tuple_becomes_connect_and_read_timeouts(self):
+        seen = {}
+
+        def handler(request):
+            seen.update(request.extensions['timeout'])
+            return httpx.Response(200)
+
+        with mock_session(handler) as session:
+            session.get('https://example.com/', timeout=(3, 7))
+        self.assertEqual(seen['connect'], 3)
+        self.assertEqual(seen['read'], 7)
+
+    def test_response_exposes_requests_api(self):
+        def handler(request):
+            return httpx.Response(200, headers={'Content-Type': 'text/html; charset=iso-8859-1'},
+                                  content='café'.encode('iso-8859-1'))
+
+        with mock_session(handler) as session:
+            response = session.get('https://example.com/page', stream=True)
+            with response:
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.encoding, 'iso-8859-1')
+                self.assertEqual(response.url, 'https://example.com/page')
+                self.assertEqual(b''.join(response.iter_content(2)), 'café'.encode('iso-8859-1'))
+
+    def test_request_errors_map_to_requests_exceptions(self):
+        cases = [
+            (httpx.ConnectTimeout('connect timed out'), requests.Timeout),
+            (httpx.ReadTimeout('read timed out'), requests.Timeout),
+            (httpx.ConnectError('refused'), requests.RequestException),
+            (httpx.RemoteProtocolError('bad frame'), requests.RequestException),
+        ]
+        for error, expected in cases:
+            with self.subTest(error=type(error).__name__):
+                def handler(request, error=error):
+                    raise error
+
+                with mock_session(handler) as session:
+                    with self.assertRaises(expected) as raised:
+                        session.get('https://example.com/')
+                self.assertIs(raised.exception.__cause__, error)
+
+    def test_body_errors_map_to_requests_exceptions(self):
+        cases = [
+            (httpx.ReadTimeout('stalled'), requests.Timeout),
+            (httpx.ReadError('reset'), requests.RequestException),
+        ]
+        for error, expected in cases:
+            for read in ('text', 'content', 'iter_content'):
+                with self.subTest(error=type(error).__name__, read=read):
+                    def handler(request, error=error):
+                        return httpx.Response(200, stream=FailingStream(error))
+
+                    with mock_session(handler) as session:
+                        response = session.get('https://example.com/', stream=True)
+                        with self.assertRaises(expected):
+                            if read == 'iter_content':
+                                list(response.iter_content(4))
+                            else:
+                                getattr(response, read)
+
+    def test_make_session_uses_configured_headers(self):
+        with make_session('http2') as session:
+            self.assertEqual(session.headers['User-Agent'], HTTP_HEADERS['User-Agent'])
+            self.assertNotIn('Connection', session._client.headers)
+
+if __name__ == "__main__":
+    unittest.main()
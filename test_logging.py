@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the queue-backed log writer: JSON lines with separate
+tracebacks, per-URL rate limiting and file rotation.
+
+Run with: python3 -m unittest test_logging
+"""
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from config import LOGGING_CONFIG
+from es import PerURLRateLimitFilter, setup_logging
+
+def make_record(message, level=logging.INFO, url='http://example.com/'):
+    record = logging.LogRecord('test', level, __file__, 1, message, None, None)
+    if url is not None:
+        record.url = url
+    return record
+
+class RateLimitFilterTest(unittest.TestCase):
+    def test_suppressed_count_reported_in_next_window(self):
+        limit = PerURLRateLimitFilter(max_records=2, interval=0.1)
+        passed = [limit.filter(make_record(f'page {n}')) for n in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        time.sleep(0.15)
+        record = make_record('page 5')
+        self.assertTrue(limit.filter(record))
+        self.assertEqual(record.getMessage(), 'page 5 (3 similar messages suppressed)')
+
+    def test_limits_are_per_url(self):
+        limit = PerURLRateLimitFilter(max_records=1, interval=60)
+        self.assertTrue(limit.filter(make_record('a', url='http://a.example.com/')))
+        self.assertTrue(limit.filter(make_record('b', url='http://b.example.com/')))
+        self.assertFalse(limit.filter(make_record('a again', url='http://a.example.com/')))
+
+    def test_warnings_and_records_without_url_bypass_limit(self):
+        limit = PerURLRateLimitFilter(max_records=1, interval=60)
+        self.assertTrue(limit.filter(make_record('first')))
+        self.assertFalse(limit.filter(make_record('second')))
+        self.assertTrue(limit.filter(make_record('warning', logging.WARNING)))
+        self.assertTrue(limit.filter(make_record('error', logging.ERROR)))
+        for _ in range(5):
+            self.assertTrue(limit.filter(make_record('no url', url=None)))
+
+class SetupLoggingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.original_config = dict(LOGGING_CONFIG)
+        LOGGING_CONFIG['file'] = os.path.join(self.tmp.name, 'scraper.log')
+        self.root = logging.getLogger()
+        self.original_handlers = list(self.root.handlers)
+        self.original_level = self.root.level
+
+    def tearDown(self):
+        for handler in self.root.handlers[:]:
+            if handler not in self.original_handlers:
+                self.root.removeHandler(handler)
+        self.root.setLevel(self.original_level)
+        LOGGING_CONFIG.clear()
+        LOGGING_CONFIG.update(self.original_config)
+        self.tmp.cleanup()
+
+    def stop(self, listener):
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+    def read_lines(self):
+        with open(LOGGING_CONFIG['file'], encoding='utf-8') as file:
+            return file.read().splitlines()
+
+    def test_json_lines_keep_exception_separate(self):
+        listener = setup_logging(json_lines=True)
+        logging.info("fetched", extra={'url': 'http://example.com/'})
+        try:
+            raise ValueError("bad page")
+        except ValueError:
+            logging.exception("boom")
+        self.stop(listener)
+
+        fetched, boom = [json.loads(line) for line in self.read_lines()]
+        self.assertEqual(fetched['message'], 'fetched')
+        self.assertEqual(fetched['url'], 'http://example.com/')
+        self.assertEqual(boom['message'], 'boom')
+        self.assertEqual(boom['level'], 'ERROR')
+        self.assertIn('Traceback', boom['exception'])
+        self.assertIn('ValueError: bad page', boom['exception'])
+
+    def test_plain_format_still_includes_traceback(self):
+        listener = setup_logging(json_lines=False)
+        try:
+            raise ValueError("bad page")
+        except ValueError:
+            logging.exception("boom")
+        self.stop(listener)
+
+        text = '\n'.join(self.read_lines())
+        self.assertIn('ERROR - boom', text)
+        self.assertIn('ValueError: bad page', text)
+
+    def test_rotation(self):
+        LOGGING_CONFIG['max_file_size'] = 2048
+        LOGGING_CONFIG['backup_count'] = 2
+        listener = setup_logging(json_lines=False)
+        for n in range(200):
+            logging.warning(f"record {n} " + 'x' * 50)
+        self.stop(listener)
+
+        files = glob.glob(LOGGING_CONFIG['file'] + '*')
+        self.assertEqual(len(files), 3)
+        self.assertTrue(all(os.path.getsize(path) <= 2048 for path in files))
+        self.assertIn('record 199', self.read_lines()[-1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the linear-time email matcher, in particular the windowed scan:
+addresses at or across a window edge must be found exactly once.
+
+Run with: python3 -m unittest test_matcher
+"""
+
+import re
+import unittest
+
+from config import EMAIL_PATTERNS
+from bs4 import BeautifulSoup
+
+from es import EMAIL_PATTERN, MATCH_REACH, SCAN_WINDOW, ScanBudget, extract_emails_from_text, find_emails
+
+ADDRESS = 'jane.doe@example.com'
+
+def full_scan(text):
+    """What one unwindowed pass of the pattern finds"""
+    return [match.group(1) for match in EMAIL_PATTERN.finditer(text)]
+
+class FindEmailsTest(unittest.TestCase):
+    def test_matches_legacy_pattern_on_ordinary_text(self):
+        text = 'Contact Jane.Doe@Example.com, sales@example.co.uk or (info+web@sub-domain.example.org).'
+        self.assertEqual(find_emails(text), re.findall(EMAIL_PATTERNS['basic'], text))
+
+    def test_no_at_sign(self):
+        self.assertEqual(find_emails('a.' * 100000), [])
+
+    def test_address_at_window_edge_between_separators(self):
+        for shift in range(-len(ADDRESS) - 2, 3):
+            with self.subTest(shift=shift):
+                # The address starts, straddles or ends exactly at the 64 KiB edge
+                text = ' ' * (SCAN_WINDOW + shift) + ADDRESS + ' ' * (2 * SCAN_WINDOW)
+                self.assertEqual(find_emails(text), [ADDRESS])
+
+    def test_address_at_window_edge_in_unbroken_run(self):
+        # No separator within reach of the edge, so the overlapping window path is used
+        for shift in (-MATCH_REACH - 1, -MATCH_REACH, -len(ADDRESS), -1, 0, 1):
+            with self.subTest(shift=shift):
+                # '@' is neither a separator nor part of a local part
+                text = '@' * (SCAN_WINDOW + shift) + ADDRESS + '@' * (2 * SCAN_WINDOW) + ADDRESS
+                self.assertEqual(find_emails(text), full_scan(text))
+                self.assertEqual(find_emails(text).count(ADDRESS), 2)
+
+    def test_many_windows_match_full_scan(self):
+        text = ''.join(f'{"word " * (row % 37)}user{row}@example.com; ' for row in range(40000))
+        self.assertGreater(len(text), 4 * SCAN_WINDOW)
+        self.assertEqual(find_emails(text), full_scan(text))
+
+    def test_overlong_parts_do_not_match(self):
+        self.assertEqual(find_emails('a' * 65 + '@example.com'), [])
+        self.assertEqual(find_emails('a' * 64 + '@example.com'), ['a' * 64 + '@example.com'])
+
+    def test_expired_budget_stops_scan(self):
+        text = 'a.b@' * (10 * SCAN_WINDOW)
+        budget = ScanBudget(1e-9)
+        find_emails(text, budget)
+        self.assertTrue(budget.exhausted)
+        self.assertFalse(ScanBudget(0).expired())
+
+    def test_exhausted_budget_warning_names_page(self):
+        soup = BeautifulSoup('<p>' + 'a.b@' * (10 * SCAN_WINDOW) + '</p>', 'html.parser')
+        with self.assertLogs(level='WARNING') as logs:
+            extract_emails_from_text(soup, ScanBudget(1e-9), url='http://example.com/slow')
+        self.assertIn('exhausted for http://example.com/slow', logs.output[0])
+        self.assertEqual(logs.records[0].url, 'http://example.com/slow')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for email normalization and the TLD index.
+
+Run with: python3 -m unittest test_normalize
+"""
+
+import re
+import unittest
+
+from config import EMAIL_EXTRACTION_CONFIG
+from es import normalize_domain, normalize_email, normalize_emails
+from tlds import TLDS
+
+TLD_FORMAT = re.compile(r'[a-z0-9]+(-[a-z0-9]+)*|xn--[a-z0-9-]+')
+
+class TldIndexTest(unittest.TestCase):
+    def test_every_entry_is_a_whole_label(self):
+        malformed = sorted(tld for tld in TLDS if not TLD_FORMAT.fullmatch(tld))
+        self.assertEqual(malformed, [])
+
+    def test_punycode_tlds_present(self):
+        for tld in ('xn--p1ai', 'xn--e1a4c', 'xn--wgbh1c', 'xn--mgbca7dzdo'):
+            self.assertIn(tld, TLDS)
+
+    def test_fragments_absent(self):
+        for fragment in ('xn', 'xn--', 'p1ai', 'e1a4c', '--wgbh1c'):
+            self.assertNotIn(fragment, TLDS)
+
+class NormalizeEmailTest(unittest.TestCase):
+    def test_idn_domains(self):
+        self.assertEqual(normalize_email('info@xn--e1a4c.xn--p1ai'), 'info@xn--e1a4c.xn--p1ai')
+        self.assertEqual(normalize_email('a@пример.рф'), 'a@xn--e1afmkfd.xn--p1ai')
+
+    def test_idna_2008(self):
+        # IDNA 2003 would turn this into strasse.de, a different domain
+        self.assertEqual(normalize_email('info@straße.de'), 'info@xn--strae-oqa.de')
+        self.assertEqual(normalize_email('info@Bücher.de'), 'info@xn--bcher-kva.de')
+
+    def test_overlong_label_rejected(self):
+        self.assertIsNone(normalize_email('a@' + 'x' * 70 + '.com'))
+        self.assertEqual(normalize_email('a@' + 'x' * 63 + '.com'), 'a@' + 'x' * 63 + '.com')
+
+    def test_unknown_tld_rejected(self):
+        self.assertIsNone(normalize_email('x@foo.e1a4c'))
+        self.assertIsNone(normalize_email('x@foo.notatld'))
+
+    def test_assets_rejected(self):
+        self.assertIsNone(normalize_email('logo@2x.png'))
+        self.assertIsNone(normalize_email('icon@3x.example.com'))
+
+    def test_tlds_that_look_like_extensions(self):
+        for tld in ('zip', 'mov', 'map'):
+            self.assertEqual(normalize_email(f'Sales@Example.{tld}'), f'sales@example.{tld}')
+
+    def test_batch_deduplicates_case_insensitively(self):
+        emails = normalize_emails(['John@Example.com', 'john@example.COM', 'bad@site.notatld'])
+        self.assertEqual(emails, {'john@example.com'})
+
+    def test_validation_can_be_disabled(self):
+        self.assertIsNone(normalize_email('x@foo.notatld'))
+        self.assertEqual(normalize_email('X@Foo.NotATld', validate=False), 'x@foo.notatld')
+        self.assertEqual(normalize_domain('Foo.NotATld', False), 'foo.notatld')
+
+        original = EMAIL_EXTRACTION_CONFIG['validate_emails']
+        EMAIL_EXTRACTION_CONFIG['validate_emails'] = False
+        try:
+            self.assertEqual(normalize_emails(['a@b.notatld']), {'a@b.notatld'})
+        finally:
+            EMAIL_EXTRACTION_CONFIG['validate_emails'] = original
+
+if __name__ == "__main__":
+    unittest.main()
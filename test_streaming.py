@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming extractor: it must find the same emails and links as
+the BeautifulSoup pipeline however the page is split into chunks.
+
+Run with: python3 -m unittest test_streaming
+"""
+
+import unittest
+
+from bs4 import BeautifulSoup
+
+from es import (StreamingPageExtractor, extract_emails_from_html, extract_links_from_page,
+                normalize_emails, stream_page)
+
+BASE_URL = 'http://example.com/team'
+
+PAGE = '''<!DOCTYPE html>
+<html><head><title>Team</title>
+<style>.x { background: url(logo@2x.png) }</style>
+<script>var hidden = "script@example.com";</script>
+</head><body>
+<p>Write to Jane.Doe@Example.com or sales&#64;example.org &mdash; we reply fast.</p>
+<p>Zürich office: büro@example.ch, café&amp;co &lt;info@cafe.example.net&gt;</p>
+<ul><li>support@example.com</li><li>a.very.long.local.part.for.chunk.boundaries@sub.domain.example.co.uk</li></ul>
+<a href="mailto:press@example.com?subject=Hi">Press</a>
+<span data-email="hr@example.com">HR</span>
+<div>info<span>@</span>obfuscated.example.com</div>
+<table><tr><td>john.doe<wbr>@example.com</td><td>x</td></tr></table>
+<a href="/about#top">About</a> <a href="contact?x=1">Contact</a>
+<a href="http://other.example.org/">Elsewhere</a>
+<noscript>noscript@example.com</noscript>
+<img src="logo@2x.png" alt="logo"/>
+</body></html>
+'''
+
+class FakeResponse:
+    """Just enough of a requests response for stream_page"""
+
+    def __init__(self, body, encoding='utf-8'):
+        self.body = body
+        self.encoding = encoding
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+class StreamingExtractorTest(unittest.TestCase):
+    def setUp(self):
+        self.body = PAGE.encode('utf-8')
+        _, self.soup_emails = extract_emails_from_html(PAGE)
+        soup = BeautifulSoup(PAGE, 'html.parser')
+        self.soup_links = set(extract_links_from_page(soup, BASE_URL, 'example.com'))
+
+    def stream(self, chunk_size):
+        links = []
+        extractor = StreamingPageExtractor(BASE_URL, on_link=links.append)
+        stream_page(FakeResponse(self.body), extractor, chunk_size=chunk_size)
+        return normalize_emails(extractor.emails), set(links)
+
+    def test_fixture_covers_text_mailto_and_attributes(self):
+        for email in ('jane.doe@example.com', 'sales@example.org', 'press@example.com', 'hr@example.com',
+                      'info@cafe.example.net', 'noscript@example.com',
+                      'info@obfuscated.example.com', 'john.doe@example.com'):
+            self.assertIn(email, self.soup_emails)
+        self.assertNotIn('script@example.com', self.soup_emails)
+
+    def test_matches_soup_at_every_chunk_size(self):
+        for chunk_size in (1, 2, 3, 7, 64, 16 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                emails, links = self.stream(chunk_size)
+                self.assertEqual(emails, self.soup_emails)
+                self.assertEqual(links, self.soup_links)
+
+    def test_partial_flush_keeps_emails_across_the_boundary(self):
+        text = 'x' * (StreamingPageExtractor.MAX_PENDING_TEXT - 10) + ' split.address@example.com tail'
+        extractor = StreamingPageExtractor(BASE_URL)
+        stream_page(FakeResponse(f'<p>{text}</p>'.encode()), extractor, chunk_size=1000)
+        self.assertEqual(extractor.emails, {'split.address@example.com'})
+
+    def test_separator_only_run_longer_than_pending_buffer(self):
+        # No whitespace anywhere, so partial flushes must cut at commas
+        addresses = [f'member{number}@example.com' for number in range(20000)]
+        html = f'<pre>{",".join(addresses)}</pre>'
+        self.assertGreater(len(html), 4 * StreamingPageExtractor.MAX_PENDING_TEXT)
+
+        _, soup_emails = extract_emails_from_html(html)
+        self.assertEqual(soup_emails, set(addresses))
+        for chunk_size in (1000, 16 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                extractor = StreamingPageExtractor(BASE_URL)
+                stream_page(FakeResponse(html.encode()), extractor, chunk_size=chunk_size)
+                self.assertEqual(extractor.emails, soup_emails)
+
+    def test_partial_flush_inside_an_address(self):
+        address = 'john.smith@example.com'
+        filler = 'x,' * (StreamingPageExtractor.MAX_PENDING_TEXT // 2)
+        for split in range(len(address) + 1):
+            with self.subTest(split=split):
+                # The buffer overflows with the address cut at every position
+                extractor = StreamingPageExtractor(BASE_URL)
+                extractor.feed(f'<p>{filler}{address[:split]}')
+                extractor.feed(f'{address[split:]},tail</p>')
+                extractor.close()
+                self.assertEqual(extractor.emails, {address})
+
+        for trailing in range(220, 260):
+            with self.subTest(trailing=trailing):
+                # A long run without whitespace follows the address when the buffer overflows
+                extractor = StreamingPageExtractor(BASE_URL)
+                extractor.feed(f'<p>{filler}{address},{"y" * trailing}')
+                extractor.feed('</p>')
+                extractor.close()
+                self.assertEqual(extractor.emails, {address})
+
+    def test_unbroken_run_longer_than_pending_buffer(self):
+        # '@' is no separator, so the overlap path keeps the run's tail
+        text = '@' * (2 * StreamingPageExtractor.MAX_PENDING_TEXT) + 'jane@example.com' + '@' * 100
+        extractor = StreamingPageExtractor(BASE_URL)
+        stream_page(FakeResponse(f'<p>{text}</p>'.encode()), extractor, chunk_size=999)
+        self.assertEqual(extractor.emails, {'jane@example.com'})
+
+    def test_links_only_mode_skips_text(self):
+        links = []
+        extractor = StreamingPageExtractor(BASE_URL, on_link=links.append, scan_text=False)
+        stream_page(FakeResponse(self.body), extractor, chunk_size=5)
+        self.assertEqual(set(links), self.soup_links)
+        self.assertNotIn('support@example.com', extractor.emails)
+
+if __name__ == "__main__":
+    unittest.main()